@@ -0,0 +1,106 @@
+"""
+Fuzzy answer matching throughput against a synthetic 10,000-answer riddle.
+
+Guesses are drawn from the accepted answers with 0, 1 or 2 random edits, plus
+unrelated words that should miss. We time Riddle.check() end to end
+(normalize_text + exact lookup + fuzzy lookup) with the bigram index, and
+compare against scanning every answer with the same bounded distance.
+
+    python benchmarks/bench_fuzzy.py [--answers 10000] [--guesses 2000] [--tolerance 1]
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.fuzzy import AnswerIndex, distance
+from quiz.riddles import compile_riddle
+
+LETTERS = string.ascii_lowercase
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(5, 14)))
+
+
+def typo(rng: random.Random, word: str) -> str:
+    i = rng.randrange(len(word))
+    kind = rng.choice("isdt")
+    if kind == "i":
+        return word[:i] + rng.choice(LETTERS) + word[i:]
+    if kind == "s":
+        return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+    if kind == "d":
+        return word[:i] + word[i + 1:]
+    if i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def make_guesses(rng, answers, n):
+    guesses = []
+    for k in range(n):
+        kind = k % 4
+        if kind == 3:
+            guesses.append(random_word(rng))  # unrelated: should miss
+            continue
+        word = rng.choice(answers)
+        for _ in range(kind):
+            word = typo(rng, word)
+        guesses.append(word)
+    return guesses
+
+
+def timed(fn, guesses):
+    t0 = time.perf_counter()
+    hits = sum(1 for g in guesses if fn(g))
+    return time.perf_counter() - t0, hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--answers", type=int, default=10_000)
+    parser.add_argument("--guesses", type=int, default=2_000)
+    parser.add_argument("--tolerance", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    answers = sorted({random_word(rng) for _ in range(args.answers)})
+    guesses = make_guesses(rng, answers, args.guesses)
+
+    t0 = time.perf_counter()
+    riddle = compile_riddle({"type": "text", "question": "?", "answers": answers, "tolerance": args.tolerance})
+    build = time.perf_counter() - t0
+
+    exact = compile_riddle({"type": "text", "question": "?", "answers": answers})
+    scan = AnswerIndex(tuple(answers))  # no tree: linear scan
+
+    rows = [
+        ("exact only", *timed(lambda g: exact.check(user_input=g), guesses)),
+        ("linear scan", *timed(lambda g: scan.match(g, args.tolerance) is not None, guesses)),
+        ("bigram index", *timed(lambda g: riddle.check(user_input=g), guesses)),
+    ]
+    print(f"{len(answers)} answers, {len(guesses)} guesses, tolerance {args.tolerance}; "
+          f"compile with index {build * 1000:.0f} ms")
+    print(f"{'matcher':<14}{'checks/s':>12}{'us/check':>11}{'accepted':>10}")
+    for name, seconds, hits in rows:
+        print(f"{name:<14}{len(guesses) / seconds:>12,.0f}{seconds / len(guesses) * 1e6:>11.1f}{hits:>10}")
+
+    # Sanity: the index must accept exactly what the scan accepts
+    mismatches = sum(
+        1 for g in guesses if (riddle.check(user_input=g)) != (scan.match(g, args.tolerance) is not None)
+    )
+    if mismatches:
+        print(f"MISMATCH: {mismatches} guesses differ between index and scan")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+normalize_text throughput: the table-driven normalizer against the old regex.
+
+Each corpus is timed with both implementations. The regex version is kept
+here verbatim as the baseline. A second table lists multilingual answers the
+regex version erased or mangled.
+
+    python benchmarks/bench_normalize.py [--repeat 200000]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.normalize import get_normalizer, normalize_text
+
+_PUNCTUATION = re.compile(r"[^a-z0-9À-ÿ\s'-]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def regex_normalize(s: str) -> str:
+    s = s.lower().strip()
+    s = _PUNCTUATION.sub(" ", s)
+    s = _WHITESPACE.sub(" ", s)
+    return s
+
+
+CORPORA = {
+    "ascii": ["piano", "  A Piano! ", "Loki", "keyboard?", "rock-n-roll", "don't", "1775"],
+    "latin-1": ["Baronesa", "Café", "São Paulo", "CORAÇÃO!", "Crème brûlée"],
+    "multilingual": ["Ὀδυσσεύς", "Москва", "東京タワー", "नमस्ते", "İstanbul", "ＰＩＡＮＯ", "don’t"],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=200_000, help="calls per corpus and implementation")
+    args = parser.parse_args(argv)
+
+    folded = get_normalizer(fold_accents=True)
+    impls = [("regex", regex_normalize), ("table", normalize_text), ("table+fold", folded)]
+
+    print(f"{'corpus':<14}" + "".join(f"{name:>14}" for name, _ in impls) + f"{'speedup':>10}")
+    for corpus, words in CORPORA.items():
+        per_call = []
+        for _, fn in impls:
+            loops = max(1, args.repeat // len(words))
+            seconds = sum(
+                min(timeit.repeat(lambda w=w: fn(w), number=loops, repeat=3)) for w in words
+            )
+            per_call.append(seconds / (loops * len(words)) * 1e9)
+        print(f"{corpus:<14}" + "".join(f"{ns:>11.0f} ns" for ns in per_call) + f"{per_call[0] / per_call[1]:>9.1f}x")
+
+    print()
+    print(f"{'input':<14}{'regex':>16}{'table':>16}{'table+fold':>16}")
+    for word in CORPORA["latin-1"] + CORPORA["multilingual"]:
+        print(f"{word:<14}" + "".join(f"{fn(word)!r:>16}" for _, fn in impls))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
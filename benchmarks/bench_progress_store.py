@@ -0,0 +1,103 @@
+"""
+Progress store throughput at 1, 100 and 1,000 concurrent players.
+
+Each simulated player is a thread that plays a full quiz (a wrong answer and
+a right one per riddle, so two saves per riddle) as fast as it can. We
+compare the batched SQLiteProgressStore against committing every save
+directly. "saves/s" is what the players see (time until every save call has
+returned), "durable ms" is how long until everything is committed, and rows
+and commits count what actually reached SQLite.
+
+    python benchmarks/bench_progress_store.py [--riddles 10]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.progress import SCHEMA, UPSERT, Progress, SQLiteProgressStore, connect
+
+PLAYERS = (1, 100, 1000)
+
+
+def play(save, player_id: str, riddles: int):
+    total = 0
+    for idx in range(riddles):
+        save(player_id, Progress("bench", idx, 1, total + 1, 0))
+        total += 2
+        save(player_id, Progress("bench", idx + 1, 0, total, 0))
+
+
+def run_players(n: int, riddles: int, save) -> float:
+    start = threading.Barrier(n + 1)
+
+    def player(i):
+        start.wait()
+        play(save, f"player-{i}", riddles)
+
+    threads = [threading.Thread(target=player, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return t0
+
+
+def bench_batched(path: Path, n: int, riddles: int) -> dict:
+    store = SQLiteProgressStore(path)
+    t0 = run_players(n, riddles, lambda pid, p: store.save(pid, "bench", p))
+    accepted = time.perf_counter() - t0
+    store.flush()
+    durable = time.perf_counter() - t0
+    store.close()
+    return {"accepted": accepted, "durable": durable, "rows": store.rows_written, "commits": store.batches}
+
+
+def bench_direct(path: Path, n: int, riddles: int) -> dict:
+    setup = connect(path)
+    setup.execute(SCHEMA)
+    setup.commit()
+    local = threading.local()
+    commits = [0]
+
+    def save(pid, p):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = connect(path)
+        with conn:
+            conn.execute(UPSERT, (pid, "bench", p.pack_version, p.idx, p.tries,
+                                  p.total_attempts, p.perfect_solves, time.time()))
+        commits[0] += 1
+
+    t0 = run_players(n, riddles, save)
+    elapsed = time.perf_counter() - t0
+    setup.close()
+    return {"accepted": elapsed, "durable": elapsed, "rows": commits[0], "commits": commits[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--riddles", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'store':<9}{'players':>8}{'saves':>8}{'saves/s':>11}{'durable ms':>12}{'rows':>8}{'commits':>9}")
+    for n in PLAYERS:
+        saves = n * args.riddles * 2
+        for name, bench in (("direct", bench_direct), ("batched", bench_batched)):
+            with tempfile.TemporaryDirectory() as tmp:
+                r = bench(Path(tmp) / "progress.db", n, args.riddles)
+            print(
+                f"{name:<9}{n:>8}{saves:>8}{saves / r['accepted']:>11.0f}"
+                f"{1000 * r['durable']:>12.1f}{r['rows']:>8}{r['commits']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
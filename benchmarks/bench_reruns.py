@@ -0,0 +1,42 @@
+"""
+Script executions and bytes sent per solved riddle.
+
+Plays the whole quiz once per app script (one wrong answer, then the right
+one, for every riddle) against a local server and prints averages per solve.
+Pass older versions of streamlit_app.py to compare, e.g.
+
+    git show <rev>:streamlit_app.py > before_app.py
+    python benchmarks/bench_reruns.py before_app.py streamlit_app.py
+"""
+
+import asyncio
+import sys
+
+import player
+
+
+def measure(script):
+    riddles = player.load_riddles(script)
+    with player.serve(script) as server:
+        load, solves = asyncio.run(player.play_through(server.url, riddles, wrong_first=True))
+    n = len(solves)
+    return {
+        "script": str(script),
+        "page_load_bytes": load.bytes,
+        "script_runs_per_solve": sum(s.script_runs for s in solves) / n,
+        "fragment_runs_per_solve": sum(s.fragment_runs for s in solves) / n,
+        "bytes_per_solve": sum(s.bytes for s in solves) / n,
+        "ms_per_solve": 1000 * sum(s.seconds for s in solves) / n,
+    }
+
+
+if __name__ == "__main__":
+    scripts = sys.argv[1:] or [player.APP_SCRIPT]
+    print(f"{'script':<28}{'load B':>10}{'runs':>7}{'frags':>7}{'B/solve':>11}{'ms/solve':>10}")
+    for script in scripts:
+        r = measure(script)
+        print(
+            f"{r['script'][-28:]:<28}{r['page_load_bytes']:>10}"
+            f"{r['script_runs_per_solve']:>7.1f}{r['fragment_runs_per_solve']:>7.1f}"
+            f"{r['bytes_per_solve']:>11.0f}{r['ms_per_solve']:>10.1f}"
+        )
@@ -0,0 +1,92 @@
+"""
+Memory per quiz session: the old dict-per-game layout vs Game with purged widgets.
+
+Each simulated session has played the default pack up to a random riddle.
+It holds its game state plus the widget values a real session keeps: the
+typed answer and the hint toggle per riddle. The old layout kept those keys
+for every riddle ever answered. The new one keeps only the current riddle's
+keys. tracemalloc measures what the sessions allocate. The pack itself is
+shared by every session in both layouts and is not counted.
+
+    python benchmarks/bench_session.py [--sessions 10000]
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.packs import load_pack
+from quiz.session import Game, purge_widgets, widget_keys
+
+QUIZ = "mariana"
+
+
+def old_session(pack, reached: int, rng: random.Random) -> dict:
+    state = {
+        f"quiz:{QUIZ}": {
+            "pack": pack,
+            "idx": reached,
+            "tries": rng.randint(0, 3),
+            "total_attempts": reached + rng.randint(0, 10),
+            "perfect_solves": rng.randint(0, reached),
+            "shown_at": time.time(),
+            "resumed": True,
+            "hinted": reached - 1,
+        }
+    }
+    for idx in range(reached + 1):
+        answer, hint = widget_keys(QUIZ, idx)
+        state[answer] = f"guess {rng.random():.6f}"
+        state[hint] = bool(idx % 2)
+    return state
+
+
+def new_session(pack, reached: int, rng: random.Random) -> dict:
+    state = {}
+    g = state[f"quiz:{QUIZ}"] = Game(pack)
+    for idx in range(reached + 1):
+        answer, hint = widget_keys(QUIZ, idx)
+        state[answer] = f"guess {rng.random():.6f}"
+        state[hint] = bool(idx % 2)
+        if idx < reached:
+            g.tries = rng.randint(0, 3)
+            g.solve(time.time())
+            purge_widgets(state, QUIZ, [idx])
+    g.hinted = reached - 1
+    return state
+
+
+def measure(build, pack, sessions: int, seed: int):
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [build(pack, rng.randrange(len(pack) + 1), rng) for _ in range(sessions)]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return states, allocated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    pack = load_pack()
+    print(f"{args.sessions} sessions on a {len(pack)}-riddle pack")
+    print(f"{'layout':<22}{'total MB':>10}{'bytes/session':>15}{'keys/session':>14}")
+    for name, build in (("dict + all widgets", old_session), ("Game + purged widgets", new_session)):
+        states, allocated = measure(build, pack, args.sessions, args.seed)
+        keys = sum(len(s) for s in states) / len(states)
+        print(f"{name:<22}{allocated / 1e6:>10.2f}{allocated / len(states):>15,.0f}{keys:>14.1f}")
+        del states
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Session snapshot cost at 10,000 sessions: write time, file size and restore.
+
+Builds N live games at random points of the default pack and snapshots them
+to a temporary file. Then it measures what a restarted process pays: opening
+the snapshot, and one restore() per returning player. A last run covers the
+steady state after a restart, where half the players are back and the rest
+are carried over from the old file.
+
+    python benchmarks/bench_snapshot.py [--sessions 10000] [--lookups 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.packs import load_pack
+from quiz.session import Game
+from quiz.snapshots import FileSessionSnapshots
+
+QUIZ = "mariana"
+
+
+def make_games(pack, n: int, rng: random.Random):
+    games = {}
+    for i in range(n):
+        g = Game(pack)
+        g.idx = rng.randrange(len(pack))
+        g.tries = rng.randint(0, 3)
+        g.total_attempts = g.idx + rng.randint(0, 10)
+        g.shown_at = time.time() - rng.uniform(0, 120)
+        games[f"player{i:08d}-{rng.getrandbits(32):08x}"] = g
+    return games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    pack = load_pack()
+    games = make_games(pack, args.sessions, rng)
+    players = list(games)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.snap")
+        before = FileSessionSnapshots(path, interval=3600)
+        for player, g in games.items():
+            before.track(player, QUIZ, g)
+        before.snapshot()
+        write = before.stats()
+        before.close()
+
+        t0 = time.perf_counter()
+        after = FileSessionSnapshots(path, interval=3600)
+        opened = time.perf_counter() - t0
+
+        sample = [rng.choice(players) for _ in range(args.lookups)]
+        t0 = time.perf_counter()
+        hits = sum(after.restore(p, QUIZ) is not None for p in sample)
+        lookup = (time.perf_counter() - t0) / len(sample)
+
+        for player in players[: len(players) // 2]:
+            after.track(player, QUIZ, games[player])
+        after.snapshot()
+        merged = after.stats()
+        after.close()
+
+    print(f"{args.sessions} sessions")
+    print(f"snapshot write        {write['seconds'] * 1000:8.1f} ms   {write['bytes'] / 1e6:.2f} MB")
+    print(f"open after restart    {opened * 1000:8.2f} ms")
+    print(f"restore per player    {lookup * 1e6:8.2f} us   ({hits}/{len(sample)} found)")
+    print(f"half back + carried   {merged['seconds'] * 1000:8.1f} ms   {merged['sessions']} records")
+    return 0 if hits == len(sample) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Startup cost: the app's imports, the first page after a boot, and warm reruns.
+
+For every sample a fresh `streamlit run` server is started and measured:
+- imports: the app script's top-level imports, timed in a fresh interpreter
+  that has already imported streamlit, plus how many modules they load;
+- first page: the first session's page load on a cold process (imports,
+  cached initializers, pack compile and the first render);
+- next page: a second session's page load once everything is warm;
+- rerun: a full rerun of that session, what every later run costs.
+
+"Page load" ends when the script run has finished sending, which is as close
+to first paint as a headless client gets. Medians over --samples servers.
+
+    python benchmarks/bench_startup.py [--samples 5] [--reruns 20]
+    python benchmarks/bench_startup.py --rev HEAD~1    # before/after in one table
+
+--rev checks an older revision out into a temporary git worktree and
+measures both trees in the same run on the same machine.
+"""
+
+import argparse
+import ast
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import player
+
+QUIET_ENV = {"QUIZ_PROGRESS_STORE": "memory:", "QUIZ_EVENT_LOG": "none", "QUIZ_SNAPSHOT": "none"}
+UNTRACKED = ("seavid.mp4",)  # copied into a worktree so both trees serve the same hero
+
+
+def measure_imports(script: Path) -> dict:
+    """Time the script's top-level imports in a fresh interpreter."""
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    imports = "\n".join(ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom)))
+    code = (
+        "import json, sys, time\n"
+        "import streamlit\n"
+        "before = len(sys.modules)\n"
+        "t0 = time.perf_counter()\n"
+        f"{imports}\n"
+        "print(json.dumps({'ms': (time.perf_counter() - t0) * 1000, 'modules': len(sys.modules) - before}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=script.parent, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": str(script.parent)},
+    )
+    return json.loads(out.stdout)
+
+
+async def page_loads(url: str, reruns: int):
+    async with player.Player(url) as first:
+        cold = await first.open()
+    async with player.Player(url) as second:
+        warm = await second.open()
+        runs = [(await second.open()).seconds for _ in range(reruns)]
+    return cold.seconds, warm.seconds, statistics.median(runs)
+
+
+def measure(script: Path, samples: int, reruns: int) -> dict:
+    env = {**os.environ, **QUIET_ENV}
+    rows = []
+    for _ in range(samples):
+        imports = measure_imports(script)
+        with player.serve(script, env=env, timeout=60) as server:
+            first, nxt, rerun = asyncio.run(page_loads(server.url, reruns))
+        rows.append((imports["ms"], imports["modules"], first * 1000, nxt * 1000, rerun * 1000))
+    med = [statistics.median(col) for col in zip(*rows)]
+    return dict(zip(("import_ms", "modules", "first_page_ms", "next_page_ms", "rerun_ms"), med))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--samples", type=int, default=5, help="fresh servers per tree")
+    parser.add_argument("--reruns", type=int, default=20, help="warm full reruns per sample")
+    parser.add_argument("--rev", help="also measure this git revision (e.g. HEAD~1)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    trees = {"working tree": player.APP_DIR}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.rev:
+            worktree = Path(tmp) / "rev"
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", str(worktree), args.rev],
+                cwd=player.APP_DIR, check=True, capture_output=True,
+            )
+            for name in UNTRACKED:
+                if (player.APP_DIR / name).is_file():
+                    shutil.copy2(player.APP_DIR / name, worktree / name)
+            trees = {args.rev: worktree, **trees}
+        try:
+            results = {label: measure(root / "streamlit_app.py", args.samples, args.reruns) for label, root in trees.items()}
+        finally:
+            if args.rev:
+                subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=player.APP_DIR)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'tree':<16}{'imports ms':>12}{'modules':>9}{'first page ms':>15}{'next page ms':>14}{'rerun ms':>10}")
+    for label, r in results.items():
+        print(
+            f"{label:<16}{r['import_ms']:>12.1f}{r['modules']:>9.0f}"
+            f"{r['first_page_ms']:>15.1f}{r['next_page_ms']:>14.1f}{r['rerun_ms']:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Load test: many simulated players against one local Streamlit server.
+
+Starts `streamlit run streamlit_app.py` on localhost and drives N concurrent
+websocket players (benchmarks/player.py) through the whole quiz. Each player
+answers wrong with probability --wrong-rate (up to --max-tries times per
+riddle), opens the hint after a wrong answer with probability --hint-rate,
+and clicks Reset at most once, with probability --reset-rate per riddle.
+
+Reported:
+- rerun latency p50/p95/p99, overall and per interaction kind
+- bytes and messages per rerun
+- server RSS (start/peak/end) and average CPU, sampled from /proc
+
+Everything runs on one machine with no network access.
+
+    python benchmarks/loadtest.py --players 200 --wrong-rate 0.3 --ramp 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import player
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# -------------------------------
+# Server resource sampling
+# -------------------------------
+class ProcessSampler:
+    """Samples RSS and CPU time of one process from /proc (Linux)."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.rss = []
+
+    def _cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            # Fields after the ")" of the command name; utime/stime are 14/15
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+    def _rss_bytes(self) -> int:
+        with open(f"/proc/{self.pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+
+    async def run(self, stop: asyncio.Event):
+        self.cpu_start = self._cpu_seconds()
+        self.t_start = time.perf_counter()
+        while not stop.is_set():
+            self.rss.append(self._rss_bytes())
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self.rss.append(self._rss_bytes())
+        self.cpu_seconds = self._cpu_seconds() - self.cpu_start
+        self.wall_seconds = time.perf_counter() - self.t_start
+
+    def report(self) -> dict:
+        mb = 1024 * 1024
+        return {
+            "rss_start_mb": round(self.rss[0] / mb, 1),
+            "rss_peak_mb": round(max(self.rss) / mb, 1),
+            "rss_end_mb": round(self.rss[-1] / mb, 1),
+            "cpu_seconds": round(self.cpu_seconds, 2),
+            "cpu_percent": round(100 * self.cpu_seconds / self.wall_seconds, 1),
+        }
+
+
+# -------------------------------
+# Players
+# -------------------------------
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)  # kind -> [RunStats]
+        self.errors = []
+        self.finished = 0
+
+    def add(self, kind: str, stats: player.RunStats):
+        if stats.messages:
+            self.samples[kind].append(stats)
+
+
+async def simulate(base_url, riddles, args, rng: random.Random, rec: Recorder):
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    async with player.Player(base_url) as p:
+        rec.add("load", await p.open())
+        reset_done = False
+        number = 1
+        while number <= len(riddles):
+            riddle = riddles[number - 1]
+            tries = 0
+            while tries < args.max_tries and rng.random() < args.wrong_rate:
+                rec.add("wrong", await p.answer(**player.wrong_answer(riddle)))
+                tries += 1
+                if p.has_hint() and rng.random() < args.hint_rate:
+                    rec.add("hint", await p.open_hint())
+                await asyncio.sleep(args.think)
+            rec.add("correct", await p.answer(**player.solution(riddle)))
+            await asyncio.sleep(args.think)
+            number += 1
+            if not reset_done and number <= len(riddles) and rng.random() < args.reset_rate:
+                rec.add("reset", await p.reset())
+                reset_done = True
+                number = 1
+            if p.riddle_number() != (number if number <= len(riddles) else None):
+                raise AssertionError(f"expected riddle {number}, page shows {p.riddle_number()}")
+    rec.finished += 1
+
+
+async def run_load(base_url, pid, riddles, args) -> dict:
+    rec = Recorder()
+    sampler = ProcessSampler(pid)
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop))
+
+    async def guarded(i):
+        try:
+            await simulate(base_url, riddles, args, random.Random(args.seed + i), rec)
+        except Exception as e:  # keep the other players going
+            rec.errors.append(f"player {i}: {type(e).__name__}: {e}")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(args.players)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await sampling
+    return summarize(rec, elapsed, sampler.report(), args)
+
+
+# -------------------------------
+# Reporting
+# -------------------------------
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def latency_summary(stats) -> dict:
+    ms = sorted(1000 * s.seconds for s in stats)
+    n = len(stats)
+    return {
+        "reruns": n,
+        "p50_ms": round(percentile(ms, 0.50), 1),
+        "p95_ms": round(percentile(ms, 0.95), 1),
+        "p99_ms": round(percentile(ms, 0.99), 1),
+        "bytes_per_rerun": round(sum(s.bytes for s in stats) / n) if n else 0,
+        "messages_per_rerun": round(sum(s.messages for s in stats) / n, 1) if n else 0,
+    }
+
+
+def summarize(rec: Recorder, elapsed: float, server: dict, args) -> dict:
+    everything = [s for samples in rec.samples.values() for s in samples]
+    return {
+        "players": args.players,
+        "finished": rec.finished,
+        "errors": rec.errors[:10],
+        "elapsed_s": round(elapsed, 2),
+        "reruns_per_s": round(len(everything) / elapsed, 1),
+        "overall": latency_summary(everything),
+        "by_kind": {kind: latency_summary(s) for kind, s in sorted(rec.samples.items())},
+        "server": server,
+    }
+
+
+def print_report(r: dict):
+    print(f"{r['finished']}/{r['players']} players finished in {r['elapsed_s']}s "
+          f"({r['reruns_per_s']} reruns/s)")
+    print(f"{'kind':<9}{'reruns':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'B/rerun':>10}{'msgs':>7}")
+    rows = [("overall", r["overall"])] + list(r["by_kind"].items())
+    for kind, s in rows:
+        print(f"{kind:<9}{s['reruns']:>8}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}"
+              f"{s['bytes_per_rerun']:>10}{s['messages_per_rerun']:>7}")
+    srv = r["server"]
+    print(f"server RSS {srv['rss_start_mb']} -> peak {srv['rss_peak_mb']} -> {srv['rss_end_mb']} MB, "
+          f"CPU {srv['cpu_seconds']}s ({srv['cpu_percent']}%)")
+    for e in r["errors"]:
+        print("error:", e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent quiz players against a local server.")
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--wrong-rate", type=float, default=0.3, help="chance each attempt is wrong")
+    parser.add_argument("--max-tries", type=int, default=3, help="wrong answers per riddle at most")
+    parser.add_argument("--hint-rate", type=float, default=0.5, help="chance to open the hint after a wrong answer")
+    parser.add_argument("--reset-rate", type=float, default=0.02, help="chance per riddle to click Reset (once per player)")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds between interactions")
+    parser.add_argument("--ramp", type=float, default=2.0, help="spread player arrivals over this many seconds")
+    parser.add_argument("--quiz", default=None, help="quiz id (defaults to QUIZ_DEFAULT)")
+    parser.add_argument("--script", default=str(player.APP_SCRIPT))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    riddles = player.load_riddles(args.script, args.quiz)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        # Keep load-test players out of the real progress database
+        env.setdefault("QUIZ_PROGRESS_STORE", f"sqlite:///{Path(tmp) / 'progress.db'}")
+        if args.quiz:
+            env["QUIZ_DEFAULT"] = args.quiz
+        with player.serve(args.script, env=env) as server:
+            report = asyncio.run(run_load(server.url, server.pid, riddles, args))
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Headless quiz player that drives a running app over Streamlit's websocket.
+
+It speaks the same protobuf protocol as the browser: send a BackMsg rerun
+request, then read ForwardMsgs until the script (or fragment) run finishes.
+Widgets are looked up by label in the deltas received so far, so no frontend
+is involved and everything runs on one machine without network access.
+"""
+
+import ast
+import asyncio
+import contextlib
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from quiz.ciphers import encode
+
+APP_DIR = Path(__file__).resolve().parent.parent
+APP_SCRIPT = APP_DIR / "streamlit_app.py"
+PACKS_DIR = APP_DIR / "packs"
+
+SUBMIT_LABEL = "Submit Answer ✨"
+RESET_LABEL = "🔄 Reset"
+HINT_LABEL = "💡 Need a hint?"
+RIDDLE_RE = re.compile(r"Riddle #(\d+)<")
+
+# Scripted players press Submit far faster than people; measure the app, not
+# the limiter (set these explicitly to load-test the limits themselves)
+BENCH_ENV = {"QUIZ_SUBMIT_RATE": "0", "QUIZ_IP_RATE": "0"}
+
+FINISHED_EARLY = ForwardMsg.FINISHED_EARLY_FOR_RERUN
+FINISHED_FRAGMENT = ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY
+
+
+# -------------------------------
+# Riddles and solutions
+# -------------------------------
+def load_riddles(script=APP_SCRIPT, quiz=None):
+    """The riddles an app script will serve, read without running it.
+
+    Older scripts carry a RIDDLES literal; newer ones load packs/<quiz>.json
+    (or .toml), where quiz defaults to QUIZ_DEFAULT or "mariana".
+    """
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "RIDDLES" for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    quiz = quiz or os.environ.get("QUIZ_DEFAULT", "mariana")
+    toml_pack = PACKS_DIR / f"{quiz}.toml"
+    if toml_pack.is_file():
+        import tomllib
+        return tomllib.loads(toml_pack.read_text(encoding="utf-8"))["riddles"]
+    return json.loads((PACKS_DIR / f"{quiz}.json").read_text(encoding="utf-8"))["riddles"]
+
+
+def solution(riddle) -> dict:
+    """Keyword arguments for Player.answer that solve this riddle."""
+    if riddle["type"] == "mcq":
+        return {"choice": riddle["answer"]}
+    if "encode" in riddle:
+        # "Type the encoding" cipher riddles carry the word, not the answer
+        return {"text": encode(riddle["cipher"], riddle["encode"], riddle.get("key"))}
+    return {"text": riddle["answers"][0]}
+
+
+def wrong_answer(riddle) -> dict:
+    if riddle["type"] == "mcq":
+        return {"choice": next(o for o in riddle["options"] if o != riddle["answer"])}
+    return {"text": "definitely not it"}
+
+
+# -------------------------------
+# Local server
+# -------------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@dataclass
+class LocalServer:
+    url: str
+    pid: int
+
+
+@contextlib.contextmanager
+def serve(script=APP_SCRIPT, port=None, env=None, timeout=30.0):
+    """Run `streamlit run script` on localhost and yield a LocalServer.
+
+    Submission rate limits are off unless env (default: os.environ) sets them.
+    """
+    port = port or free_port()
+    env = {**BENCH_ENV, **(os.environ if env is None else env)}
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", str(script),
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.enableXsrfProtection", "false",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    # The script's own tree: its relative paths (styles/, seavid.mp4) resolve there
+    proc = subprocess.Popen(
+        cmd, cwd=Path(script).resolve().parent, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{base}/_stcore/health", timeout=1).read()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Streamlit did not start on port {port}")
+                time.sleep(0.2)
+        yield LocalServer(base, proc.pid)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# -------------------------------
+# Player
+# -------------------------------
+@dataclass
+class RunStats:
+    """What one interaction cost: script executions, messages and bytes."""
+    script_runs: int = 0
+    fragment_runs: int = 0
+    messages: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def __iadd__(self, other: "RunStats") -> "RunStats":
+        self.script_runs += other.script_runs
+        self.fragment_runs += other.fragment_runs
+        self.messages += other.messages
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+        return self
+
+
+class Player:
+    """One simulated browser tab."""
+
+    def __init__(self, base_url: str, query_string: str = ""):
+        self.ws_url = base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.query_string = query_string
+        self.page_script_hash = ""
+        self._ws = None
+        # delta path -> (element or block proto, fragment id)
+        self._elements = {}
+
+    async def __aenter__(self) -> "Player":
+        self._ws = await websockets.connect(
+            self.ws_url, subprotocols=["streamlit"], max_size=None
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._ws.close()
+
+    # -- interactions --------------------------------------------------
+    async def open(self) -> RunStats:
+        """The initial page load."""
+        return await self._rerun()
+
+    async def answer(self, text=None, choice=None) -> RunStats:
+        """Fill in the current riddle and press the submit button."""
+        if choice is not None:
+            field, _ = self._widget("radio")
+            value = {"id": field.id, "string_value": choice}
+        else:
+            field, _ = self._widget("text_input")
+            value = {"id": field.id, "string_value": text or ""}
+        button, fragment_id = self._widget("button", SUBMIT_LABEL)
+        return await self._rerun([value, {"id": button.id, "trigger_value": True}], fragment_id)
+
+    async def reset(self) -> RunStats:
+        button, fragment_id = self._widget("button", RESET_LABEL)
+        return await self._rerun([{"id": button.id, "trigger_value": True}], fragment_id)
+
+    async def open_hint(self) -> RunStats:
+        """Expand the hint after a wrong answer.
+
+        The app tracks the expander's state to log a hint event, so opening it
+        reruns the riddle fragment. The hint has to survive that rerun. An
+        expander that is already open stays open, like in a browser.
+        """
+        expander, fragment_id = self._widget("expandable", HINT_LABEL)
+        if not expander.id or expander.expanded:
+            return RunStats()
+        stats = await self._rerun([{"id": expander.id, "bool_value": True}], fragment_id)
+        if self.hint_text() is None:
+            raise AssertionError("the hint is gone after opening it")
+        return stats
+
+    def has_hint(self) -> bool:
+        try:
+            self._widget("expandable", HINT_LABEL)
+        except LookupError:
+            return False
+        return True
+
+    def hint_text(self):
+        """Text inside the hint expander, or None when there is none."""
+        for path, (block, _) in self._elements.items():
+            if block.WhichOneof("type") == "expandable" and block.expandable.label == HINT_LABEL:
+                break
+        else:
+            return None
+        for child, (element, _) in sorted(self._elements.items()):
+            if child[:len(path)] == path and child != path and element.WhichOneof("type") == "alert":
+                return element.alert.body
+        return None
+
+    # -- page inspection -----------------------------------------------
+    def riddle_number(self):
+        """1-based number of the riddle on screen, or None when finished."""
+        for element, _ in self._elements.values():
+            if element.WhichOneof("type") == "markdown":
+                m = RIDDLE_RE.search(element.markdown.body)
+                if m:
+                    return int(m.group(1))
+        return None
+
+    def page_text(self) -> str:
+        return "\n".join(
+            e.markdown.body for e, _ in self._elements.values() if e.WhichOneof("type") == "markdown"
+        )
+
+    def _widget(self, kind, label=None):
+        for path in sorted(self._elements):
+            element, fragment_id = self._elements[path]
+            if element.WhichOneof("type") != kind:
+                continue
+            proto = getattr(element, kind)
+            if label is None or proto.label == label:
+                return proto, fragment_id
+        raise LookupError(f"No {kind} {label or ''} on the page")
+
+    # -- protocol ------------------------------------------------------
+    async def _rerun(self, widgets=(), fragment_id="") -> RunStats:
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = self.query_string
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        for w in widgets:
+            state.widget_states.widgets.add(**w)
+
+        stats = RunStats()
+        t0 = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+
+        seen = set()
+        drew = False
+        while True:
+            data = await self._ws.recv()
+            stats.messages += 1
+            stats.bytes += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+
+            if kind == "new_session":
+                self.page_script_hash = fwd.new_session.page_script_hash
+                seen = set()
+                drew = False
+            elif kind == "page_info_changed":
+                self.query_string = fwd.page_info_changed.query_string
+            elif kind == "delta" and fwd.delta.WhichOneof("type") in ("new_element", "add_block"):
+                path = tuple(fwd.metadata.delta_path)
+                delta = fwd.delta
+                proto = delta.new_element if delta.HasField("new_element") else delta.add_block
+                self._elements[path] = (proto, delta.fragment_id)
+                seen.add(path)
+                drew = True
+            elif kind == "script_finished":
+                status = fwd.script_finished
+                # A run that a callback cut short before the body ran draws
+                # nothing and is not counted as an execution.
+                if status == FINISHED_FRAGMENT:
+                    stats.fragment_runs += 1
+                elif drew or status != FINISHED_EARLY:
+                    stats.script_runs += 1
+                if status == FINISHED_EARLY:
+                    continue
+                self._drop_stale(seen, fragment_only=status == FINISHED_FRAGMENT)
+                break
+
+        stats.seconds = time.perf_counter() - t0
+        return stats
+
+    def _drop_stale(self, seen, fragment_only: bool):
+        """Forget elements the last run did not redraw, like the frontend does."""
+        if fragment_only:
+            rerun = {self._elements[p][1] for p in seen}
+            stale = [
+                p for p, (_, frag) in self._elements.items()
+                if frag in rerun and p not in seen
+            ]
+        else:
+            stale = [p for p in self._elements if p not in seen]
+        for p in stale:
+            del self._elements[p]
+
+
+async def play_through(base_url: str, riddles, wrong_first: bool = False):
+    """Solve every riddle once; returns (load stats, per-solve stats list)."""
+    solves = []
+    async with Player(base_url) as player:
+        load = await player.open()
+        for number, riddle in enumerate(riddles, start=1):
+            assert player.riddle_number() == number, player.riddle_number()
+            stats = RunStats()
+            if wrong_first:
+                stats += await player.answer(**wrong_answer(riddle))
+            stats += await player.answer(**solution(riddle))
+            solves.append(stats)
+        assert player.riddle_number() is None
+    return load, solves
+
+
+if __name__ == "__main__":
+    riddles = load_riddles()
+    with serve() as server:
+        load, solves = asyncio.run(play_through(server.url, riddles))
+    print(load)
+    for s in solves:
+        print(s)
@@ -0,0 +1,213 @@
+"""
+Replay recorded play sessions through AppTest and catch performance regressions.
+
+    python benchmarks/replay.py                      # benchmarks/recordings/*.jsonl vs the baseline
+    python benchmarks/replay.py my.jsonl other.jsonl
+    python benchmarks/replay.py --update-baseline    # accept the current numbers
+    python benchmarks/replay.py --threshold 0.05 --latency-threshold 0.5 --json
+
+Recordings come from quiz/recording.py (?record=<QUIZ_RECORD_KEY>). Each
+"open" step starts a fresh AppTest session with the recorded query
+parameters, so reloads and resume URLs replay as new sessions of the same
+player. Answers and choices go through the real widgets and the Submit
+button, and "reset" presses Reset. AppTest cannot open an expander, so
+"hint" steps are counted but skipped.
+
+The app runs in this process with a memory progress store, no event log, no
+snapshots and no rate limits. Recorded player ids are mapped to fresh ones,
+so the same recording can be replayed again and again. Signed ?progress=
+tokens are dropped, because the recording server's key is not known here. A
+resume then comes from the progress store, as it does in production.
+
+Per recording this measures script runs, fragment runs and ForwardMsg bytes,
+read from the app's own metrics endpoint (QUIZ_METRICS_PORT), plus the wall
+time of every interaction after the cold first run, which is reported on its
+own. A metric fails when it exceeds the baseline
+(benchmarks/replay_baseline.json) by more than its threshold:
+- run counts: any increase (they are deterministic);
+- bytes: --threshold (10%);
+- latency: --latency-threshold (50%, wall time is noisy).
+The exit status is 1 on any regression, and also when the baseline or a
+recording's entry in it is missing (--allow-missing-baseline skips those).
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from player import APP_SCRIPT, RESET_LABEL, SUBMIT_LABEL, free_port
+
+sys.path.insert(0, str(APP_SCRIPT.parent))
+
+from quiz.recording import load_recording
+
+RECORDINGS_DIR = Path(__file__).resolve().parent / "recordings"
+BASELINE = Path(__file__).resolve().parent / "replay_baseline.json"
+METRICS_PORT = free_port()
+REPLAY_ENV = {
+    "QUIZ_PROGRESS_STORE": "memory:",
+    "QUIZ_EVENT_LOG": "none",
+    "QUIZ_SNAPSHOT": "none",
+    "QUIZ_SUBMIT_RATE": "0",
+    "QUIZ_IP_RATE": "0",
+    "QUIZ_TOKEN_SECRET": "replay",
+    "QUIZ_METRICS_PORT": str(METRICS_PORT),
+}
+COUNTS = ("script_runs", "fragment_runs")
+
+
+def metrics_runs() -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{METRICS_PORT}/metrics.json", timeout=5) as resp:
+        return json.load(resp)["runs"]
+
+
+def totals(runs: dict) -> dict:
+    return {
+        "script_runs": runs.get("script", {}).get("count", 0),
+        "fragment_runs": sum(r["count"] for kind, r in runs.items() if kind.startswith("fragment:")),
+        "bytes": sum(r["bytes"] for r in runs.values()),
+    }
+
+
+class Replayer:
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self.at = None
+        self.quiz = None
+        self.players = {}  # recorded player id -> fresh id
+        self.latencies = []
+        self.skipped = 0
+
+    def _timed(self, fn):
+        t0 = time.perf_counter()
+        fn()
+        self.latencies.append(time.perf_counter() - t0)
+        if self.at.exception:
+            raise RuntimeError(f"app raised: {self.at.exception[0].message}")
+
+    def _button(self, label: str):
+        return next(b for b in self.at.button if b.label == label)
+
+    def step(self, step: dict):
+        from streamlit.testing.v1 import AppTest
+
+        kind = step["do"]
+        if kind == "open":
+            query = dict(step.get("query", {}))
+            recorded = query.get("player", "")
+            query["player"] = self.players.setdefault(recorded, secrets.token_urlsafe(12))
+            query.pop("progress", None)
+            self.quiz = query.get("quiz", os.environ.get("QUIZ_DEFAULT", "mariana"))
+            self.at = AppTest.from_file(str(APP_SCRIPT), default_timeout=self.timeout)
+            for key, value in query.items():
+                self.at.query_params[key] = value
+            self._timed(self.at.run)
+        elif kind in ("answer", "choose"):
+            key = f"{self.quiz}_answer_{step['riddle']}"
+            if kind == "answer":
+                self.at.text_input(key=key).input(step["value"] or "")
+            else:
+                self.at.radio(key=key).set_value(step["value"])
+            self._timed(lambda: self._button(SUBMIT_LABEL).click().run())
+        elif kind == "reset":
+            self._timed(lambda: self._button(RESET_LABEL).click().run())
+        else:
+            self.skipped += 1
+
+
+def replay(path: Path) -> dict:
+    steps = load_recording(path)
+    if not steps or steps[0]["do"] != "open":
+        raise ValueError(f"{path.name}: a recording must start with an open step")
+    r = Replayer()
+    r.step(steps[0])  # the first run starts the metrics endpoint
+    before = totals(metrics_runs())
+    first = r.latencies[0]
+    for step in steps[1:]:
+        r.step(step)
+    after = totals(metrics_runs())
+    result = {k: after[k] - before[k] for k in after}
+    # The opening run happened before the first reading; count it as one script run
+    result["script_runs"] += 1
+    # The cold first run is reported on its own; it would swamp mean and p95
+    lat = sorted(r.latencies[1:]) or [first]
+    result.update(
+        steps=len(steps),
+        skipped=r.skipped,
+        first_run_ms=round(first * 1000, 1),
+        mean_ms=round(1000 * sum(lat) / len(lat), 2),
+        p95_ms=round(1000 * lat[min(len(lat) - 1, int(0.95 * len(lat)))], 2),
+    )
+    return result
+
+
+def compare(name: str, current: dict, base: dict, threshold: float, latency_threshold: float) -> list:
+    problems = []
+    for metric in COUNTS:
+        if current[metric] > base[metric]:
+            problems.append(f"{name}: {metric} {base[metric]} -> {current[metric]}")
+    checks = [("bytes", threshold), ("mean_ms", latency_threshold), ("p95_ms", latency_threshold)]
+    for metric, limit in checks:
+        if base.get(metric) and current[metric] > base[metric] * (1 + limit):
+            change = current[metric] / base[metric] - 1
+            problems.append(f"{name}: {metric} {base[metric]} -> {current[metric]} (+{change:.0%}, limit {limit:.0%})")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recordings", nargs="*", help="recording files (default: benchmarks/recordings/*.jsonl)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed growth in bytes (fraction)")
+    parser.add_argument("--latency-threshold", type=float, default=0.50, help="allowed growth in mean/p95 latency")
+    parser.add_argument("--update-baseline", action="store_true", help="write the current numbers as the baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true", help="exit 0 when there is no baseline yet")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    os.environ.update(REPLAY_ENV)
+    paths = [Path(p).resolve() for p in args.recordings] or sorted(RECORDINGS_DIR.glob("*.jsonl"))
+    os.chdir(APP_SCRIPT.parent)  # the app opens styles/ and seavid.mp4 relative to its own tree
+    results = {p.stem: replay(p) for p in paths}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'recording':<24}{'steps':>6}{'runs':>6}{'frags':>6}{'KB':>9}{'first ms':>10}{'mean ms':>9}{'p95 ms':>8}")
+        for name, r in results.items():
+            print(
+                f"{name:<24}{r['steps']:>6}{r['script_runs']:>6}{r['fragment_runs']:>6}{r['bytes'] / 1024:>9.1f}"
+                f"{r['first_run_ms']:>10.1f}{r['mean_ms']:>9.1f}{r['p95_ms']:>8.1f}"
+            )
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.is_file() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.is_file():
+        print(f"no baseline at {args.baseline}; run with --update-baseline first", file=sys.stderr)
+        return 0 if args.allow_missing_baseline else 1
+
+    baseline = json.loads(args.baseline.read_text())
+    problems = []
+    for name, r in results.items():
+        if name in baseline:
+            problems += compare(name, r, baseline[name], args.threshold, args.latency_threshold)
+        elif args.allow_missing_baseline:
+            print(f"{name}: not in the baseline, skipped", file=sys.stderr)
+        else:
+            problems.append(f"{name}: not in the baseline (add it with --update-baseline)")
+    for line in problems:
+        print("REGRESSION " + line, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Support modules for Mariana's Birthday Quiz.
+
+Everything in here is imported by streamlit_app.py and lives for the whole
+server process, so process-wide state (servers, caches, indexes) belongs here
+rather than in the script, which Streamlit re-executes on every rerun.
+"""
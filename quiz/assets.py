@@ -0,0 +1,317 @@
+"""
+Static asset serving for the hero media.
+
+The hero video used to travel inside the page as a base64 data URI, so every
+rerun pushed the whole file down the websocket again. Instead we publish it
+under a content-hashed file name and hand the browser a plain URL that it can
+cache forever and fetch with Range requests.
+
+Serving modes (QUIZ_ASSET_MODE):
+- "static": copy into ./static and let Streamlit serve it from app/static/
+  (needs server.enableStaticServing, see .streamlit/config.toml). Streamlit
+  sends ETag and handles Range, but sets no Cache-Control and ignores the
+  .gz/.br variants, so the hashed names only help with revalidation.
+- "server": run a small local HTTP server with Range, ETag, Cache-Control and
+  precompressed (.br/.gz) variants. It binds 127.0.0.1:8502 unless
+  QUIZ_ASSET_HOST/QUIZ_ASSET_PORT say otherwise. Remote browsers need those
+  settings and a reachable QUIZ_ASSET_BASE_URL (or a proxy).
+- "inline": the old base64 data URI, kept for debugging
+"""
+
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = APP_DIR / "static"
+STATIC_URL = "app/static"
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# -------------------------------
+# Content hashing
+# -------------------------------
+# (absolute path, mtime_ns, size) -> value, so an unchanged file is read once
+# per process (prewarm fills these before the first session needs them)
+StatKey = Tuple[str, int, int]
+_DIGESTS: Dict[StatKey, str] = {}
+_DATA_URIS: Dict[StatKey, str] = {}
+
+
+def _stat_key(path) -> StatKey:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def file_digest(path) -> str:
+    """Return the sha256 hex digest of a file, read in chunks."""
+    key = _stat_key(path)
+    digest = _DIGESTS.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+        digest = _DIGESTS[key] = h.hexdigest()
+    return digest
+
+
+def data_uri(path) -> str:
+    """A base64 data URI for a file (inline mode)."""
+    key = _stat_key(path)
+    uri = _DATA_URIS.get(key)
+    if uri is None:
+        mime = mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        data64 = base64.b64encode(Path(path).read_bytes()).decode("ascii")
+        # Only the current version of each file is worth keeping
+        for stale in [k for k in _DATA_URIS if k[0] == key[0]]:
+            del _DATA_URIS[stale]
+        uri = _DATA_URIS[key] = f"data:{mime};base64,{data64}"
+    return uri
+
+
+def hashed_name(path, digest: Optional[str] = None) -> str:
+    """seavid.mp4 -> seavid.<12 hex chars>.mp4"""
+    p = Path(path)
+    digest = digest or file_digest(p)
+    return f"{p.stem}.{digest[:12]}{p.suffix}"
+
+
+def tmp_name(path: Path) -> Path:
+    """A temporary sibling of path to write before os.replace() moves it into place."""
+    # One name per writer: the prewarm thread and a first session may build at once
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def publish_static(path, static_dir: Path = STATIC_DIR) -> str:
+    """Copy a file into the static folder under its hashed name and return its URL."""
+    name = hashed_name(path)
+    target = static_dir / name
+    if not target.exists():
+        static_dir.mkdir(parents=True, exist_ok=True)
+        tmp = tmp_name(target)
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, target)
+    return f"{STATIC_URL}/{name}"
+
+
+# -------------------------------
+# Local asset server
+# -------------------------------
+class Asset(NamedTuple):
+    path: Path
+    size: int
+    etag: str
+    mime: str
+    # (content-coding, path, size) of precompressed siblings, best first
+    encodings: Tuple[Tuple[str, Path, int], ...] = ()
+
+
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_codings(header: str) -> set:
+    """Content-codings an Accept-Encoding header allows (q=0 excluded)."""
+    codings = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag ("*", or weakly, as W/"...")."""
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=" range into inclusive (start, end).
+
+    Returns None when the header should be ignored (malformed or multi-range,
+    in which case the whole file is sent) and raises ValueError when the range
+    cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    if not (first or last) or not (first or "0").isdigit() or not (last or "0").isdigit():
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            raise ValueError(f"empty suffix range {header!r}")
+    if start >= size or start > end:
+        raise ValueError(f"unsatisfiable range {header!r} for {size} bytes")
+    return start, min(end, size - 1)
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    """Serves registered assets only; anything else is a 404."""
+
+    server: "AssetServer"
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body: bool):
+        asset = self.server.lookup(self.path)
+        if asset is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        range_header = self.headers.get("Range")
+        path, size, etag, coding = asset.path, asset.size, asset.etag, None
+        if asset.encodings and not range_header:
+            # Ranges always address the identity bytes, so only whole-file
+            # responses get a precompressed variant
+            accepted = accepted_codings(self.headers.get("Accept-Encoding", ""))
+            for name, variant, variant_size in asset.encodings:
+                if name in accepted:
+                    path, size, etag, coding = variant, variant_size, f'{asset.etag[:-1]}-{name}"', name
+                    break
+
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(asset, etag)
+            self.end_headers()
+            return
+
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        if_range = self.headers.get("If-Range")
+        if range_header and (if_range is None or if_range == asset.etag):
+            try:
+                parsed = parse_range(range_header, size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if parsed is not None:
+                start, end = parsed
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        length = end - start + 1
+        self.send_response(status)
+        self._common_headers(asset, etag)
+        self.send_header("Content-Type", asset.mime)
+        self.send_header("Content-Length", str(length))
+        if coding:
+            self.send_header("Content-Encoding", coding)
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if send_body:
+            try:
+                self._copy(path, start, length)
+            except (BrokenPipeError, ConnectionResetError):
+                # Browsers routinely drop video requests mid-stream
+                pass
+
+    def _common_headers(self, asset: Asset, etag: str):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", IMMUTABLE)
+        self.send_header("Accept-Ranges", "bytes")
+        if asset.encodings:
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def _copy(self, path: Path, start: int, length: int):
+        with open(path, "rb") as f:
+            f.seek(start)
+            while length > 0:
+                chunk = f.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                length -= len(chunk)
+
+    def log_message(self, format, *args):
+        # Keep the Streamlit console readable
+        pass
+
+
+class AssetServer(ThreadingHTTPServer):
+    """Tiny threaded HTTP server for content-hashed, immutable assets."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8502, base_url: Optional[str] = None):
+        super().__init__((host, port), AssetHandler)
+        self.base_url = (base_url or f"http://{host}:{self.server_address[1]}").rstrip("/")
+        self._assets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "AssetServer":
+        return cls(
+            host=os.environ.get("QUIZ_ASSET_HOST", "127.0.0.1"),
+            port=int(os.environ.get("QUIZ_ASSET_PORT", "8502")),
+            base_url=os.environ.get("QUIZ_ASSET_BASE_URL"),
+        )
+
+    def register(self, path, name: Optional[str] = None) -> str:
+        """Expose a file under its hashed name and return the public URL.
+
+        Pass name for files that already carry a content hash (build output).
+        Sibling <file>.br / <file>.gz files are served to clients that accept
+        those encodings.
+        """
+        p = Path(path).resolve()
+        digest = file_digest(p)
+        name = name or hashed_name(p, digest)
+        mime = mimetypes.guess_type(p.name)[0] or "application/octet-stream"
+        encodings = tuple(
+            (coding, variant, variant.stat().st_size)
+            for coding, suffix in PRECOMPRESSED
+            for variant in [p.with_name(p.name + suffix)]
+            if variant.is_file()
+        )
+        asset = Asset(p, p.stat().st_size, f'"{digest}"', mime, encodings)
+        with self._lock:
+            self._assets[name] = asset
+        return f"{self.base_url}/{name}"
+
+    def lookup(self, url_path: str) -> Optional[Asset]:
+        name = url_path.split("?", 1)[0].lstrip("/")
+        return self._assets.get(name)
+
+    def start(self) -> "AssetServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.serve_forever, name="quiz-asset-server", daemon=True
+            )
+            self._thread.start()
+        return self
@@ -0,0 +1,239 @@
+"""
+Build step for the static front-end assets.
+
+    python -m quiz.build           # minify styles/ into static/
+    python -m quiz.build fonts     # vendor the Google Fonts into styles/fonts/ (needs network once)
+    python -m quiz.build media     # hero poster + video renditions (needs ffmpeg, see quiz/media.py)
+
+The stylesheet used to be a 400-line <style> string that every full rerun
+re-sent over the websocket, and it @imported Google Fonts, which blocks
+rendering and fails offline. Instead:
+
+- styles/quiz.css (plus styles/fonts/fonts.css once the fonts are vendored)
+  is minified into static/quiz.<hash>.css;
+- every font file it references is copied next to it under a content-hashed
+  name and the url() rewritten to match;
+- .gz (and .br when the brotli package is installed) siblings are written so
+  the asset server can send precompressed bytes;
+- static/manifest.json records the output names and the source stamp.
+
+The app calls ensure_styles(), which rebuilds only when the sources changed,
+and emits one <link> to the hashed file.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from quiz.assets import STATIC_DIR, file_digest, hashed_name, tmp_name
+
+try:
+    import brotli
+except ModuleNotFoundError:  # optional: gzip alone still precompresses
+    brotli = None
+
+APP_DIR = Path(__file__).resolve().parent.parent
+STYLES_DIR = APP_DIR / "styles"
+MANIFEST = "manifest.json"
+
+GOOGLE_FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700;900"
+    "&family=Inter:wght@400;500;600&display=swap"
+)
+# Google serves woff2 only to browsers it recognises
+WOFF2_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+_CSS_TOKENS = re.compile(r"""(/\*.*?\*/)|("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|([^"'/]+|/)""", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};:,>])\s*")
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace, leaving strings untouched."""
+    out, code = [], []
+
+    def flush():
+        text = _CSS_SPACE.sub(" ", "".join(code))
+        out.append(_CSS_PUNCT.sub(r"\1", text))
+        code.clear()
+
+    for comment, string, chunk in _CSS_TOKENS.findall(css):
+        if string:
+            flush()
+            out.append(string)
+        elif chunk:
+            code.append(chunk)
+    flush()
+    return "".join(out).replace(";}", "}").strip()
+
+
+def write_atomic(path: Path, data: bytes):
+    tmp = tmp_name(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def precompress(path: Path) -> List[Path]:
+    """Write path.gz (and path.br) next to a file; returns the new files."""
+    raw = path.read_bytes()
+    written = [path.with_name(path.name + ".gz")]
+    # mtime=0 keeps the output byte-for-byte reproducible
+    write_atomic(written[0], gzip.compress(raw, compresslevel=9, mtime=0))
+    if brotli is not None:
+        written.append(path.with_name(path.name + ".br"))
+        write_atomic(written[1], brotli.compress(raw, quality=11))
+    return written
+
+
+def styles_stamp(styles_dir: Path = STYLES_DIR) -> List[list]:
+    """(name, mtime_ns, size) of every source file, to detect stale builds."""
+    stamp = []
+    for p in sorted(styles_dir.rglob("*")):
+        if p.is_file():
+            stat = p.stat()
+            stamp.append([p.relative_to(styles_dir).as_posix(), stat.st_mtime_ns, stat.st_size])
+    return stamp
+
+
+# -------------------------------
+# Stylesheet
+# -------------------------------
+def build_styles(styles_dir: Path = STYLES_DIR, out_dir: Path = STATIC_DIR) -> dict:
+    """Minify, hash and precompress the stylesheet; returns the manifest."""
+    styles_dir, out_dir = Path(styles_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sources = [styles_dir / "fonts" / "fonts.css", styles_dir / "quiz.css"]
+    css = "\n".join(p.read_text(encoding="utf-8") for p in sources if p.is_file())
+    if not sources[0].is_file():
+        # Fonts not vendored yet: keep loading them from Google rather than losing them
+        css = f'@import url("{GOOGLE_FONTS_URL}");\n' + css
+
+    fonts = []
+
+    def vendor(match):
+        quote, ref = match.group(1), match.group(2)
+        if ref.startswith(("data:", "http:", "https:", "//")):
+            return match.group(0)
+        src = (styles_dir / "fonts" / ref).resolve()
+        name = hashed_name(src, file_digest(src))
+        if not (out_dir / name).exists():
+            tmp = tmp_name(out_dir / name)
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, out_dir / name)
+        fonts.append(name)
+        return f"url({quote}{name}{quote})"
+
+    css = minify_css(_CSS_URL.sub(vendor, css))
+    data = css.encode("utf-8")
+    name = f"quiz.{hashlib.sha256(data).hexdigest()[:12]}.css"
+    target = out_dir / name
+    if not target.exists():
+        write_atomic(target, data)
+        precompress(target)
+
+    manifest = {"stylesheet": name, "fonts": sorted(set(fonts)), "source": styles_stamp(styles_dir)}
+    write_atomic(out_dir / MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+
+_BUILD_LOCK = threading.Lock()
+
+
+def ensure_styles(styles_dir: Path = STYLES_DIR, out_dir: Path = STATIC_DIR) -> dict:
+    """The current manifest, rebuilding first if the sources changed.
+
+    Callers in one process take turns, so a stale build is redone once.
+    """
+    with _BUILD_LOCK:
+        return _current_styles(styles_dir, out_dir)
+
+
+def _current_styles(styles_dir: Path, out_dir: Path) -> dict:
+    try:
+        manifest = json.loads((Path(out_dir) / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if (
+        manifest is None
+        or manifest.get("source") != styles_stamp(styles_dir)
+        or not (Path(out_dir) / manifest["stylesheet"]).is_file()
+    ):
+        manifest = build_styles(styles_dir, out_dir)
+    return manifest
+
+
+# -------------------------------
+# Font vendoring
+# -------------------------------
+def vendor_fonts(url: str = GOOGLE_FONTS_URL, dest: Optional[Path] = None) -> Path:
+    """Download a Google Fonts stylesheet and its woff2 files into dest."""
+    import urllib.request  # only this command goes online; the app never needs it
+
+    dest = Path(dest or STYLES_DIR / "fonts")
+    dest.mkdir(parents=True, exist_ok=True)
+
+    def fetch(u: str) -> bytes:
+        req = urllib.request.Request(u, headers={"User-Agent": WOFF2_USER_AGENT})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.read()
+
+    css = fetch(url).decode("utf-8")
+
+    def download(match):
+        remote = match.group(2)
+        name = remote.rsplit("/", 1)[-1]
+        if not (dest / name).exists():
+            write_atomic(dest / name, fetch(remote))
+        return f"url({name})"
+
+    css = _CSS_URL.sub(download, css)
+    header = f"/* Vendored from {url} by `python -m quiz.build fonts` */\n"
+    (dest / "fonts.css").write_text(header + css, encoding="utf-8")
+    return dest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quiz.build", description=__doc__.split("\n\n")[0])
+    parser.add_argument("target", nargs="?", default="styles", choices=("styles", "fonts", "media"))
+    args = parser.parse_args(argv)
+
+    if args.target == "fonts":
+        dest = vendor_fonts()
+        print(f"Fonts vendored into {dest}; run `python -m quiz.build` to rebuild the stylesheet")
+        return 0
+    if args.target == "media":
+        from quiz.media import MediaError, build_media
+
+        try:
+            media = build_media()
+        except (MediaError, OSError) as e:
+            print(f"media build failed: {e}", file=sys.stderr)
+            return 1
+        for r in media["renditions"]:
+            print(f"{r['file']}: {r['width']}w, {r['bytes']} B")
+        print(f"poster {media['poster']}")
+        return 0
+    manifest = build_styles()
+    target = STATIC_DIR / manifest["stylesheet"]
+    sizes = ", ".join(f"{p.suffix} {p.stat().st_size} B" for p in [target, *sorted(target.parent.glob(target.name + ".*"))])
+    print(f"{target.name}: {sizes}; {len(manifest['fonts'])} font files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
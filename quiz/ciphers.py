@@ -0,0 +1,221 @@
+"""
+Cipher riddles generated from plain text.
+
+A pack riddle with "type": "cipher" names a cipher and either a plaintext to
+hide in the question (the player decodes it and answers it) or a word to
+encode (the player types the encoding):
+
+    {"type": "cipher", "cipher": "caesar", "plaintext": "How many ...?",
+     "answers": ["8"], "hint": "Shift each letter back by {key}"}
+    {"type": "cipher", "cipher": "binary", "encode": "mariana",
+     "question": "Type your name in binary."}
+
+Keyed ciphers (caesar, vigenere) without a fixed "key" get "variants"
+randomly keyed versions of the question, and each player is shown one of
+them. "{key}" in the hint and "{ciphertext}" in the question are filled in
+per variant. Keys are drawn from a generator seeded by the riddle itself, so
+a player sees the same puzzle after a restart or a pack reload.
+
+Single encodings go through precomputed str.translate tables. Variants are
+encoded in bulk: with NumPy, the plaintext becomes one uint8 row and all keys
+are applied to a (variants x length) array at once. Without NumPy the tables
+are used for every variant. NumPy is imported on the first bulk encoding, not
+with this module: importing it takes about 100 ms, and the app only needs it
+when a pack with keyed variants is compiled.
+"""
+
+import hashlib
+import random
+import string
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+CIPHERS = ("atbash", "caesar", "vigenere", "binary", "hex", "morse")
+KEYED = ("caesar", "vigenere")
+LABELS = {
+    "atbash": "Atbash cipher",
+    "caesar": "Caesar cipher",
+    "vigenere": "Vigenère cipher",
+    "binary": "Binary",
+    "hex": "Hex",
+    "morse": "Morse code",
+}
+DEFAULT_QUESTION = "({label}) {ciphertext}"
+DEFAULT_VARIANTS = 256
+MAX_VARIANTS = 4096
+VIGENERE_KEY_LENGTH = 5
+
+UPPER = string.ascii_uppercase
+# Random byte -> A-Z (256 % 26 leaves a slight lean towards A-V; fine for a puzzle)
+KEY_LETTERS = bytes(65 + b % 26 for b in range(256))
+ATBASH = str.maketrans(UPPER, UPPER[::-1])
+CAESAR = [str.maketrans(UPPER, UPPER[k:] + UPPER[:k]) for k in range(26)]
+MORSE = {
+    "A": ".-", "B": "-...", "C": "-.-.", "D": "-..", "E": ".", "F": "..-.",
+    "G": "--.", "H": "....", "I": "..", "J": ".---", "K": "-.-", "L": ".-..",
+    "M": "--", "N": "-.", "O": "---", "P": ".--.", "Q": "--.-", "R": ".-.",
+    "S": "...", "T": "-", "U": "..-", "V": "...-", "W": ".--", "X": "-..-",
+    "Y": "-.--", "Z": "--..",
+    "0": "-----", "1": ".----", "2": "..---", "3": "...--", "4": "....-",
+    "5": ".....", "6": "-....", "7": "--...", "8": "---..", "9": "----.",
+    ".": ".-.-.-", ",": "--..--", "?": "..--..", "'": ".----.", "!": "-.-.--",
+    "-": "-....-", "/": "-..-.", "(": "-.--.", ")": "-.--.-", "&": ".-...",
+    ":": "---...", "=": "-...-", "+": ".-.-.", '"': ".-..-.", "@": ".--.-.",
+}
+
+
+# -------------------------------
+# Single encodings
+# -------------------------------
+def vigenere(text: str, key: str) -> str:
+    shifts = [ord(c) - 65 for c in key.upper()]
+    out, n = [], 0
+    for ch in text:
+        if "A" <= ch <= "Z":
+            ch = chr((ord(ch) - 65 + shifts[n % len(shifts)]) % 26 + 65)
+            n += 1
+        out.append(ch)
+    return "".join(out)
+
+
+def morse(text: str) -> str:
+    words = (" ".join(MORSE[c] for c in word if c in MORSE) for word in text.split())
+    return " / ".join(w for w in words if w)
+
+
+UNMORSE = {code: ch for ch, code in MORSE.items()}
+
+
+def encode(cipher: str, text: str, key=None) -> str:
+    """text encoded with cipher; letter ciphers work on the upper-cased text."""
+    if cipher == "binary":
+        return " ".join(format(b, "08b") for b in text.encode("utf-8"))
+    if cipher == "hex":
+        return text.encode("utf-8").hex(" ")
+    text = text.upper()
+    if cipher == "atbash":
+        return text.translate(ATBASH)
+    if cipher == "caesar":
+        return text.translate(CAESAR[key % 26])
+    if cipher == "vigenere":
+        return vigenere(text, key)
+    if cipher == "morse":
+        return morse(text)
+    raise ValueError(f"unknown cipher {cipher!r}")
+
+
+def decode(cipher: str, text: str, key=None) -> str:
+    """Inverse of encode (up to case, and characters Morse cannot carry)."""
+    if cipher == "binary":
+        return bytes(int(b, 2) for b in text.split()).decode("utf-8")
+    if cipher == "hex":
+        return bytes.fromhex(text).decode("utf-8")
+    if cipher == "atbash":
+        return text.translate(ATBASH)
+    if cipher == "caesar":
+        return text.translate(CAESAR[-key % 26])
+    if cipher == "vigenere":
+        return vigenere(text, "".join(chr(65 + (26 - (ord(c) - 65)) % 26) for c in key.upper()))
+    if cipher == "morse":
+        return " ".join("".join(UNMORSE[c] for c in word.split()) for word in text.split(" / "))
+    raise ValueError(f"unknown cipher {cipher!r}")
+
+
+# -------------------------------
+# Bulk encodings
+# -------------------------------
+@lru_cache(maxsize=None)
+def _numpy():
+    try:
+        import numpy
+    except ModuleNotFoundError:  # optional: translate tables do the same work
+        return None
+    return numpy
+
+
+def _letters(np, text: str):
+    row = np.frombuffer(text.upper().encode("utf-8"), dtype=np.uint8)
+    # UTF-8 continuation bytes are >= 0x80, so A-Z bytes are always letters
+    return row, (row >= 65) & (row <= 90)
+
+
+def _rows(grid) -> List[str]:
+    width = grid.shape[1]
+    raw = grid.tobytes()
+    return [raw[i:i + width].decode("utf-8") for i in range(0, len(raw), width)]
+
+
+def encode_many(cipher: str, text: str, keys: Sequence) -> List[str]:
+    """encode(cipher, text, key) for every key, vectorized when NumPy is there."""
+    bulk = cipher in KEYED and keys and not (cipher == "vigenere" and len({len(key) for key in keys}) > 1)
+    np = _numpy() if bulk else None
+    if np is None:
+        return [encode(cipher, text, key) for key in keys]
+    row, mask = _letters(np, text)
+    grid = np.repeat(row[None, :], len(keys), axis=0)
+    letters = row[mask].astype(np.int16) - 65
+    if cipher == "caesar":
+        shifts = np.asarray(keys, dtype=np.int16)[:, None]
+    else:
+        joined = "".join(keys).upper().encode("ascii")
+        table = np.frombuffer(joined, dtype=np.uint8).reshape(len(keys), -1).astype(np.int16) - 65
+        stream = np.arange(len(letters)) % table.shape[1]
+        shifts = table[:, stream]
+    grid[:, mask] = ((letters + shifts) % 26 + 65).astype(np.uint8)
+    return _rows(grid)
+
+
+def random_keys(cipher: str, n: int, rng: random.Random) -> list:
+    if cipher == "caesar":
+        # Only 25 useful shifts, so never more than 25 variants
+        return rng.sample(range(1, 26), min(n, 25))
+    k = VIGENERE_KEY_LENGTH
+    letters = rng.randbytes(n * k).translate(KEY_LETTERS).decode("ascii")
+    return [letters[i:i + k] for i in range(0, n * k, k)]
+
+
+# -------------------------------
+# Compiling pack riddles
+# -------------------------------
+def _fill(template: str, **values) -> str:
+    # Plain replace rather than format(), so other braces in a pack are safe
+    for name, value in values.items():
+        template = template.replace("{" + name + "}", str(value))
+    return template
+
+
+def compile_cipher(raw: dict) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+    """(accepted answers as written, ((question, hint), ...) variants)."""
+    cipher = raw["cipher"]
+    hint = raw.get("hint", "")
+    key = raw.get("key")
+    if "encode" in raw:
+        answer = encode(cipher, raw["encode"], key)
+        return (answer,), ((raw["question"], _fill(hint, key=key)),)
+
+    question = raw.get("question", DEFAULT_QUESTION.replace("{label}", LABELS[cipher]))
+    keys = variant_keys(raw)
+    variants = tuple(
+        (_fill(question, ciphertext=text), _fill(hint, key=k))
+        for text, k in zip(encode_many(cipher, raw["plaintext"], keys), keys)
+    )
+    return tuple(raw["answers"]), variants
+
+
+def variant_keys(raw: dict) -> list:
+    """The key of every variant of a plaintext cipher riddle, in order."""
+    cipher = raw["cipher"]
+    if cipher not in KEYED:
+        return [None]
+    if raw.get("key") is not None:
+        return [raw["key"]]
+    seed = hashlib.sha256(f"{cipher}\0{raw['plaintext']}".encode("utf-8")).digest()
+    return random_keys(cipher, raw.get("variants", DEFAULT_VARIANTS), random.Random(seed))
+
+
+def pick(variants: Sequence, player: str) -> Optional[int]:
+    """Stable variant index for a player (None when there is nothing to pick)."""
+    if len(variants) < 2:
+        return None
+    digest = hashlib.blake2b(player.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % len(variants)
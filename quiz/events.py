@@ -0,0 +1,300 @@
+"""
+Quiz analytics: an append-only event log and a streaming aggregator.
+
+The app records one event per interaction:
+
+    attempt  a wrong answer              (riddle, try = wrong answers before it)
+    correct  a right answer              (riddle, try, secs since the riddle was shown)
+    hint     the hint opened             (riddle; once per riddle per game)
+    reset    the player started over     (riddle they were on)
+    resume   a saved game was restored   (riddle they resumed at)
+
+Each event is one JSON object per line, e.g.
+
+    {"t": 1760648400.12, "e": "correct", "q": "mariana", "v": "3f1c0a9b2e7d",
+     "p": "Xy...", "r": 4, "try": 1, "secs": 21.4}
+
+record() only puts a dict on a bounded queue. A writer thread serializes
+it and appends it to a line-buffered file, so the render thread never
+touches the disk or json. If the disk stalls and the queue fills, events
+are dropped and counted rather than blocking players. The log is
+QUIZ_EVENT_LOG: a file path (default events.jsonl next to the app) or
+"none".
+
+Aggregator folds events into per-riddle counters as they arrive:
+players, solves, first-try solves, wrong attempts, hints, and time to solve
+(total plus a coarse histogram for percentiles). Riddles are keyed by quiz,
+pack version and index, so an edited riddle starts fresh counters instead of
+mixing with the old wording. It remembers its byte offset, so catching up with
+a growing log only reads the new lines:
+
+    python -m quiz.events                        # per-riddle table for QUIZ_EVENT_LOG (events.jsonl)
+    python -m quiz.events other/events.jsonl     # another log
+    python -m quiz.events --follow               # keep tailing and reprinting
+    python -m quiz.events --json                 # machine-readable
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATH = APP_DIR / "events.jsonl"
+KINDS = ("attempt", "correct", "hint", "reset", "resume")
+# Time-to-solve histogram bucket upper bounds in seconds (last one is open)
+SOLVE_BUCKETS = (5, 10, 20, 30, 60, 120, 300, 600, float("inf"))
+
+
+# -------------------------------
+# Writing
+# -------------------------------
+class EventLog:
+    """Base class: a log that records nothing."""
+
+    enabled = False
+
+    def record(self, kind: str, quiz: str, version: str, player: str, riddle: Optional[int] = None, **extra):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+    def flush(self):
+        """Block until every event recorded so far is written."""
+
+    def close(self):
+        self.flush()
+
+
+class FileEventLog(EventLog):
+    """Appends events to a JSON-lines file from a background thread."""
+
+    enabled = True
+
+    def __init__(self, path, max_pending: int = 10_000):
+        self.path = str(path)
+        self.written = self.dropped = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(max_pending)
+        # Line-buffered append: every event is on disk as a whole line
+        self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="quiz-event-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, kind, quiz, version, player, riddle=None, **extra):
+        event = {"t": round(time.time(), 3), "e": kind, "q": quiz, "v": version, "p": player}
+        if riddle is not None:
+            event["r"] = riddle
+        event.update(extra)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                self._queue.task_done()
+                return
+            self._file.write(json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n")
+            self.written += 1
+            self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {"written": self.written, "dropped": self.dropped, "pending": self._queue.qsize()}
+
+    def flush(self):
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+
+
+def open_event_log(url: Optional[str] = None) -> EventLog:
+    """Build the log named by QUIZ_EVENT_LOG (a path, or "none")."""
+    url = url or os.environ.get("QUIZ_EVENT_LOG", str(DEFAULT_PATH))
+    if url == "none":
+        return EventLog()
+    log = FileEventLog(url)
+    atexit.register(log.close)
+    return log
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def read_new(path, offset: int = 0) -> Tuple[List[dict], int]:
+    """Complete events after byte offset, and the offset to resume from.
+
+    A half-written last line is left for the next call. If the file shrank
+    (rotated or truncated) reading restarts from the top.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < offset:
+                offset = 0
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = chunk.rfind(b"\n") + 1
+    events = []
+    for line in chunk[:end].splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue  # a corrupt line must not stop the stream
+    return events, offset + end
+
+
+# -------------------------------
+# Aggregation
+# -------------------------------
+@dataclass
+class RiddleStats:
+    players: int = 0  # first attempts, i.e. players who tried this riddle
+    solves: int = 0
+    first_try: int = 0
+    wrong: int = 0
+    hints: int = 0
+    solve_secs: float = 0.0
+    solve_hist: List[int] = field(default_factory=lambda: [0] * len(SOLVE_BUCKETS))
+
+    def add_solve(self, secs: float):
+        self.solve_secs += secs
+        for i, bound in enumerate(SOLVE_BUCKETS):
+            if secs <= bound:
+                self.solve_hist[i] += 1
+                break
+
+    def solve_percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the q-th solve time
+        (the open last bucket reports its lower bound, 600)."""
+        timed = sum(self.solve_hist)
+        if not timed:
+            return None
+        rank, seen = q * timed, 0
+        for bound, n in zip(SOLVE_BUCKETS, self.solve_hist):
+            seen += n
+            if seen >= rank:
+                break
+        return bound if bound != SOLVE_BUCKETS[-1] else SOLVE_BUCKETS[-2]
+
+    def summary(self) -> dict:
+        players = max(self.players, 1)
+        timed = sum(self.solve_hist)
+        return {
+            "players": self.players,
+            "solves": self.solves,
+            "solve_rate": round(self.solves / players, 3),
+            "first_try_rate": round(self.first_try / players, 3),
+            "wrong_per_solve": round(self.wrong / max(self.solves, 1), 2),
+            "hint_rate": round(self.hints / players, 3),
+            "mean_solve_secs": round(self.solve_secs / timed, 1) if timed else None,
+            "p50_solve_secs": self.solve_percentile(0.5),
+            "p90_solve_secs": self.solve_percentile(0.9),
+        }
+
+
+class Aggregator:
+    """Per-(quiz, pack version, riddle) statistics, updated one event at a time."""
+
+    def __init__(self):
+        self.riddles: Dict[Tuple[str, str, int], RiddleStats] = {}
+        self.counts: Dict[str, int] = dict.fromkeys(KINDS, 0)
+        self.offset = 0  # bytes of the log already folded in
+
+    def add(self, event: dict):
+        kind = event.get("e")
+        if kind not in self.counts:
+            return
+        self.counts[kind] += 1
+        if kind in ("reset", "resume") or "r" not in event:
+            return
+        key = (event.get("q", ""), event.get("v", ""), event["r"])
+        stats = self.riddles.get(key)
+        if stats is None:
+            stats = self.riddles[key] = RiddleStats()
+        if kind == "hint":
+            stats.hints += 1
+            return
+        tries = event.get("try", 0)
+        if tries == 0:
+            stats.players += 1
+        if kind == "attempt":
+            stats.wrong += 1
+            return
+        stats.solves += 1
+        if tries == 0:
+            stats.first_try += 1
+        if "secs" in event:
+            stats.add_solve(event["secs"])
+
+    def update(self, path) -> int:
+        """Fold in events appended to path since the last call; returns how many."""
+        events, self.offset = read_new(path, self.offset)
+        for event in events:
+            self.add(event)
+        return len(events)
+
+    def report(self) -> dict:
+        return {
+            "events": self.counts,
+            "riddles": [
+                {"quiz": quiz, "version": version, "riddle": riddle + 1, **stats.summary()}
+                for (quiz, version, riddle), stats in sorted(self.riddles.items())
+            ],
+        }
+
+
+def format_report(report: dict) -> str:
+    columns = ("quiz", "version", "riddle", "players", "solve_rate", "first_try_rate", "hint_rate",
+               "wrong_per_solve", "mean_solve_secs", "p90_solve_secs")
+    rows = [columns] + [tuple("-" if r[c] is None else str(r[c]) for c in columns) for r in report["riddles"]]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    lines = ["  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in rows]
+    lines.append("events: " + ", ".join(f"{k}={v}" for k, v in report["events"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quiz.events", description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", nargs="?", default=os.environ.get("QUIZ_EVENT_LOG", str(DEFAULT_PATH)))
+    parser.add_argument("--follow", "-f", action="store_true", help="keep tailing the log and reprint on new events")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls with --follow")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    agg = Aggregator()
+    agg.update(args.path)
+    show = (lambda: print(json.dumps(agg.report()), flush=True)) if args.json else (
+        lambda: print(format_report(agg.report()) + "\n", flush=True)
+    )
+    show()
+    if not args.follow:
+        return 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            if agg.update(args.path):
+                show()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
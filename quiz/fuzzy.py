@@ -0,0 +1,163 @@
+"""
+Typo-tolerant answer matching.
+
+A text riddle can set "tolerance": N in its pack to also accept answers within
+N edits of an accepted one, so "pianoo" or "barroness" count. An edit is an
+insertion, deletion, substitution, or a swap of two neighbouring letters
+(optimal string alignment distance).
+
+distance() is banded and bounded: it only fills the diagonal strip of width
+2 * bound + 1, and it stops as soon as a whole row exceeds the bound. Checking
+a guess against a typical answer is a few dozen cell updates.
+
+AnswerIndex picks the search strategy by size. A few answers are scanned
+directly. Larger sets get an inverted bigram index partitioned by word length.
+One edit changes at most two of a word's padded bigrams and a swap at most
+three, so an answer within k edits shares at least len + 1 - 3k bigrams with
+the guess (counted with multiplicity). Only answers of compatible length that
+pass that count are confirmed with distance(). When the bound drops to zero
+(short words, large tolerance) the count filters nothing, and the index scans
+the compatible lengths instead.
+
+A BK-tree was measured first: random-ish answers bunch up at similar
+distances, and a swap costs 2 under the Levenshtein metric it needs, so on a
+10,000-answer pack it visited most of the tree and lost to a plain scan.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_TOLERANCE = 3  # beyond this almost any short word matches
+LINEAR_MAX = 32  # up to this many answers a scan beats the index
+
+PAD = "\x00"  # marks word boundaries; normalize_text never produces it
+
+# (length, bigram) -> ((answer id, occurrences), ...)
+Postings = Dict[Tuple[int, str], Tuple[Tuple[int, int], ...]]
+
+
+def distance(a: str, b: str, bound: int) -> int:
+    """Edit distance between a and b, or bound + 1 if it exceeds bound."""
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    big = bound + 1
+    if lb - la > bound:
+        return big
+    if la == 0:
+        return lb
+
+    prev2 = None
+    prev = [j if j <= bound else big for j in range(lb + 1)]
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        lo = max(1, i - bound)
+        hi = min(lb, i + bound)
+        cur = [big] * (lb + 1)
+        if i <= bound:
+            cur[0] = i
+        row_min = cur[0]
+        for j in range(lo, hi + 1):
+            cb = b[j - 1]
+            v = prev[j - 1] if ca == cb else prev[j - 1] + 1
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            if (
+                i > 1
+                and j > 1
+                and ca == b[j - 2]
+                and a[i - 2] == cb
+                and prev2[j - 2] + 1 < v
+            ):
+                v = prev2[j - 2] + 1
+            if v > big:
+                v = big
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > bound:
+            return big
+        prev2, prev = prev, cur
+    return prev[lb] if prev[lb] <= bound else big
+
+
+# -------------------------------
+# Bigram index
+# -------------------------------
+def bigrams(word: str) -> Dict[str, int]:
+    padded = PAD + word + PAD
+    counts: Dict[str, int] = {}
+    for i in range(len(padded) - 1):
+        gram = padded[i:i + 2]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def build_postings(words: Tuple[str, ...]) -> Postings:
+    lists: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
+    for i, word in enumerate(words):
+        for gram, n in bigrams(word).items():
+            lists.setdefault((len(word), gram), []).append((i, n))
+    return {key: tuple(ids) for key, ids in lists.items()}
+
+
+# -------------------------------
+# Answer index
+# -------------------------------
+@dataclass(frozen=True)
+class AnswerIndex:
+    words: Tuple[str, ...]
+    # Only built for more than LINEAR_MAX answers; dicts are unhashable, so
+    # these stay out of __eq__/__hash__ (words already identifies the index)
+    postings: Optional[Postings] = field(default=None, compare=False, repr=False)
+    by_length: Optional[Dict[int, Tuple[int, ...]]] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "AnswerIndex":
+        words = tuple(sorted(set(words)))
+        if len(words) <= LINEAR_MAX:
+            return cls(words)
+        by_length: Dict[int, List[int]] = {}
+        for i, word in enumerate(words):
+            by_length.setdefault(len(word), []).append(i)
+        return cls(
+            words,
+            build_postings(words),
+            {n: tuple(ids) for n, ids in by_length.items()},
+        )
+
+    def candidates(self, query: str, tolerance: int) -> Iterable[str]:
+        """Answers that may be within tolerance edits of query."""
+        if self.postings is None:
+            return self.words
+        lq = len(query)
+        lengths = [n for n in range(lq - tolerance, lq + tolerance + 1) if n in self.by_length]
+        # Shared bigrams needed for a word of length n: max(lq, n) + 1 - 3k
+        if lq + 1 - 3 * tolerance <= 0:
+            return [self.words[i] for n in lengths for i in self.by_length[n]]
+        shared: Dict[int, int] = {}
+        for gram, q in bigrams(query).items():
+            for n in lengths:
+                for i, c in self.postings.get((n, gram), ()):
+                    shared[i] = shared.get(i, 0) + (c if c < q else q)
+        words = self.words
+        need = lq + 1 - 3 * tolerance
+        return [
+            words[i] for i, s in shared.items()
+            if s >= need and s >= len(words[i]) + 1 - 3 * tolerance
+        ]
+
+    def match(self, query: str, tolerance: int) -> Optional[str]:
+        """The closest accepted answer within tolerance edits, if any."""
+        best, best_d = None, tolerance + 1
+        for word in self.candidates(query, tolerance):
+            d = distance(query, word, best_d - 1)
+            if d < best_d:
+                best, best_d = word, d
+                if d == 0:
+                    break
+        return best
@@ -0,0 +1,143 @@
+"""
+Live leaderboard.
+
+Players are ranked per quiz by riddles solved, then perfect solves, then
+accuracy (solved / attempts). Ties go to whoever got there first. A player
+keeps their best run, so a reset never pushes them down the board. Progress
+that play cannot produce (fewer attempts than solves) is never ranked.
+
+Each quiz keeps a list of sort keys in rank order. A solve replaces the
+player's key with bisect: an O(log n) search, plus a memmove for the list
+delete and insert that stays cheap even for 100k players. Nothing is ever
+rescanned.
+
+Renders never touch that list. top() returns an immutable snapshot of the
+first K rows, rebuilt at most once per refresh interval (O(K)) and shared
+by every session in between. rank() answers "where am I" with one bisect.
+Player ids restore progress, so the board shows a short hash of them
+instead.
+
+The board starts from one scan of the progress store at startup (seed())
+and is kept current by update() on every solve.
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from quiz.progress import Progress
+
+# (-solved, -perfect solves, -accuracy, sequence): ascending order is rank order
+SortKey = Tuple[int, int, float, int]
+
+
+@dataclass(frozen=True)
+class Standing:
+    rank: int
+    player: str
+    solved: int
+    perfect_solves: int
+    accuracy: float  # 0..1
+    name: str  # shown instead of the player id, which restores their progress
+
+
+def display_name(player: str) -> str:
+    return "Player " + hashlib.blake2b(player.encode("utf-8"), digest_size=3).hexdigest().upper()
+
+
+def sort_key(progress: Progress, seq: int) -> SortKey:
+    return (-progress.idx, -progress.perfect_solves, -progress.accuracy, seq)
+
+
+class _Board:
+    def __init__(self):
+        self.keys: List[Tuple[SortKey, str]] = []  # sorted, best first
+        self.best: Dict[str, SortKey] = {}
+        self.snapshot: Tuple[Standing, ...] = ()
+        self.snapshot_at = float("-inf")
+
+
+class Leaderboard:
+    def __init__(self, size: int = 10, refresh: float = 5.0):
+        self.size = size
+        self.refresh = refresh
+        self.updates = self.snapshots = self.rejected = 0
+        self._boards: Dict[str, _Board] = {}
+        self._seq = count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Leaderboard":
+        return cls(
+            size=int(os.environ.get("QUIZ_LEADERBOARD_SIZE", "10")),
+            refresh=float(os.environ.get("QUIZ_LEADERBOARD_REFRESH", "5")),
+        )
+
+    def seed(self, rows: Iterable[Tuple[str, str, Progress]]) -> "Leaderboard":
+        """Load (player, quiz, progress) rows once, e.g. ProgressStore.scan()."""
+        for player, quiz, progress in rows:
+            self.update(quiz, player, progress)
+        return self
+
+    def update(self, quiz: str, player: str, progress: Progress) -> bool:
+        """Record a player's progress; True if it improved their standing."""
+        if progress.idx <= 0:
+            return False
+        if not progress.plausible:
+            self.rejected += 1
+            return False
+        with self._lock:
+            board = self._boards.get(quiz)
+            if board is None:
+                board = self._boards[quiz] = _Board()
+            key = sort_key(progress, next(self._seq))
+            old = board.best.get(player)
+            if old is not None:
+                if old[:3] <= key[:3]:
+                    return False  # not better than their best run
+                del board.keys[bisect.bisect_left(board.keys, (old, player))]
+            bisect.insort(board.keys, (key, player))
+            board.best[player] = key
+            self.updates += 1
+            return True
+
+    def top(self, quiz: str) -> Tuple[Standing, ...]:
+        """The first `size` standings, at most `refresh` seconds old."""
+        board = self._boards.get(quiz)
+        if board is None:
+            return ()
+        now = time.monotonic()
+        if now - board.snapshot_at < self.refresh:
+            return board.snapshot
+        with self._lock:
+            if now - board.snapshot_at >= self.refresh:
+                board.snapshot = tuple(
+                    Standing(rank, player, -key[0], -key[1], -key[2], display_name(player))
+                    for rank, (key, player) in enumerate(board.keys[:self.size], start=1)
+                )
+                board.snapshot_at = now
+                self.snapshots += 1
+            return board.snapshot
+
+    def rank(self, quiz: str, player: str) -> Optional[int]:
+        """A player's current 1-based rank, or None if they are not on the board."""
+        with self._lock:
+            board = self._boards.get(quiz)
+            key = board.best.get(player) if board else None
+            if key is None:
+                return None
+            return bisect.bisect_left(board.keys, (key, player)) + 1
+
+    def stats(self) -> dict:
+        return {
+            "quizzes": len(self._boards),
+            "players": sum(len(b.best) for b in self._boards.values()),
+            "updates": self.updates,
+            "snapshots": self.snapshots,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,140 @@
+"""
+Adaptive hero media: a poster frame first, then a video sized to the screen.
+
+    python -m quiz.build media     # needs ffmpeg on PATH (or QUIZ_FFMPEG)
+
+Even served from cache, `<video autoplay>` with one full-size MP4 made phones
+on slow links download the whole file before anything showed. The build
+step encodes seavid.mp4 offline into:
+
+- a JPEG poster of the first frame, shown as soon as the page paints;
+- H.264 renditions at RENDITION_WIDTHS (never upscaled), without audio
+  because the hero is muted, and with the index up front (+faststart) so
+  playback starts before the download ends;
+
+all under content-hashed names in static/, recorded in static/media.json
+with the source stamp. The app then offers every rendition as a
+`<source media="...">` picked by viewport width. Every query also requires
+prefers-reduced-motion: no-preference, so a reduced-motion browser matches
+no source and keeps the poster without downloading video. Save-Data
+requests get the poster alone (see the app's hero section).
+
+load_media() returns None when nothing was built or the source changed
+since, and the app falls back to the single published video.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from quiz.assets import APP_DIR, STATIC_DIR, file_digest, hashed_name, tmp_name
+
+VIDEO = APP_DIR / "seavid.mp4"
+MEDIA_MANIFEST = "media.json"
+RENDITION_WIDTHS = (640, 1280, 1920)
+POSTER_WIDTH = 1280
+CRF = 28  # the hero sits under a dark overlay, so a high CRF is invisible
+MOTION_OK = "(prefers-reduced-motion: no-preference)"
+
+
+class MediaError(Exception):
+    pass
+
+
+def source_stamp(src) -> list:
+    stat = os.stat(src)
+    return [Path(src).name, stat.st_mtime_ns, stat.st_size]
+
+
+# -------------------------------
+# Build (offline)
+# -------------------------------
+def ffmpeg_path() -> str:
+    exe = shutil.which(os.environ.get("QUIZ_FFMPEG", "ffmpeg"))
+    if exe is None:
+        raise MediaError("ffmpeg not found: install it or point QUIZ_FFMPEG at the binary")
+    return exe
+
+
+def _ffmpeg(exe: str, *args: str):
+    proc = subprocess.run([exe, "-y", "-hide_banner", "-v", "error", *args], capture_output=True, text=True)
+    if proc.returncode:
+        raise MediaError(proc.stderr.strip() or f"ffmpeg exited with {proc.returncode}")
+
+
+def _publish(tmp: Path, name: str, out_dir: Path, digest: Optional[str] = None) -> str:
+    """Move a built file into out_dir under its content-hashed name."""
+    hashed = hashed_name(name, digest or file_digest(tmp))
+    os.replace(tmp, out_dir / hashed)
+    return hashed
+
+
+def build_media(
+    src=VIDEO, out_dir: Path = STATIC_DIR, widths: Sequence[int] = RENDITION_WIDTHS
+) -> dict:
+    """Encode the poster and renditions of src; returns the manifest."""
+    src, out_dir = Path(src), Path(out_dir)
+    exe = ffmpeg_path()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scale = "scale=w='min({},iw)':h=-2"
+    renditions, published = [], {}  # digest -> file, for widths the source is narrower than
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".media.") as tmp_dir:
+        poster = Path(tmp_dir) / "poster.jpg"
+        _ffmpeg(exe, "-i", str(src), "-frames:v", "1", "-vf", scale.format(POSTER_WIDTH), "-q:v", "4", str(poster))
+        poster_name = _publish(poster, f"{src.stem}.poster.jpg", out_dir)
+        for width in sorted(widths):
+            out = Path(tmp_dir) / f"{width}.mp4"
+            _ffmpeg(
+                exe, "-i", str(src), "-an", "-vf", scale.format(width),
+                "-c:v", "libx264", "-preset", "slow", "-crf", str(CRF), "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart", str(out),
+            )
+            size, digest = out.stat().st_size, file_digest(out)
+            if digest not in published:
+                published[digest] = _publish(out, f"{src.stem}.{width}{src.suffix}", out_dir, digest)
+            renditions.append({"width": width, "file": published[digest], "bytes": size})
+
+    manifest = {"source": source_stamp(src), "poster": poster_name, "renditions": renditions}
+    data = json.dumps(manifest, indent=2).encode("utf-8")
+    tmp = tmp_name(out_dir / MEDIA_MANIFEST)
+    tmp.write_bytes(data)
+    os.replace(tmp, out_dir / MEDIA_MANIFEST)
+    return manifest
+
+
+# -------------------------------
+# Runtime
+# -------------------------------
+def load_media(src=VIDEO, out_dir: Path = STATIC_DIR) -> Optional[dict]:
+    """The media manifest if it was built from the current src, else None."""
+    out_dir = Path(out_dir)
+    try:
+        manifest = json.loads((out_dir / MEDIA_MANIFEST).read_text(encoding="utf-8"))
+        stale = manifest["source"] != source_stamp(src)
+    except (OSError, ValueError, KeyError):
+        return None
+    files = [manifest["poster"]] + [r["file"] for r in manifest["renditions"]]
+    if stale or not manifest["renditions"] or not all((out_dir / f).is_file() for f in files):
+        return None
+    return manifest
+
+
+def sources(manifest: dict) -> List[Tuple[str, str]]:
+    """(media query, file) per rendition, narrowest first.
+
+    Each rendition serves viewports up to its own width and the widest one
+    everything above. Renditions that came out identical (a source narrower
+    than several widths) collapse into the widest query that uses them.
+    """
+    renditions = sorted(manifest["renditions"], key=lambda r: r["width"])
+    out = []
+    for i, r in enumerate(renditions):
+        if i + 1 < len(renditions) and renditions[i + 1]["file"] == r["file"]:
+            continue
+        last = i + 1 == len(renditions)
+        out.append((MOTION_OK if last else f"{MOTION_OK} and (max-width: {r['width']}px)", r["file"]))
+    return out
@@ -0,0 +1,330 @@
+"""
+Per-rerun instrumentation.
+
+Every script run (and every fragment-only rerun) becomes a RunRecord holding
+its wall time, the time spent in labelled sections, and the number of
+elements, messages and serialized bytes it sent to the browser. The most
+recent records live in an in-process ring buffer, and running totals feed
+an HTTP endpoint. Two formats are served:
+- Prometheus text at /metrics
+- JSON at /metrics.json
+
+Instrumentation is off unless QUIZ_METRICS=1 (or QUIZ_METRICS_PORT is set).
+When it is off, every hook returns immediately, and timed() hands back the
+undecorated function.
+
+Sections can be timed in three ways:
+- lap(label) charges the time since the previous lap to label. This suits the
+  top level of the script, where wrapping 400 lines of CSS in a `with` block
+  is not practical.
+- section(label) is a context manager for smaller blocks.
+- timed(label) decorates a fragment. On a full run it is a section of that
+  run. When Streamlit reruns only the fragment, it becomes a run of its own.
+
+Sections timed outside any run carry over to the next run on the same thread.
+Widget callbacks run before the script body, so their time is charged to the
+rerun they trigger.
+
+Bytes are counted by wrapping the session's ScriptRunContext enqueue
+function, so they are the sizes of the ForwardMsgs Streamlit actually sends
+(cached-message references included).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+_NULL = nullcontext()
+
+
+@dataclass
+class RunRecord:
+    kind: str  # "script" or "fragment:<label>"
+    started: float  # unix time
+    seconds: float = 0.0
+    sections: Dict[str, float] = field(default_factory=dict)
+    elements: int = 0
+    blocks: int = 0
+    messages: int = 0
+    bytes: int = 0
+    finished: bool = False  # False when st.stop / an exception cut it short
+
+    def add_section(self, label: str, seconds: float):
+        self.sections[label] = self.sections.get(label, 0.0) + seconds
+
+
+class _Active:
+    """The run in progress on one script thread."""
+
+    __slots__ = ("record", "t0", "lap")
+
+    def __init__(self, record: RunRecord):
+        self.record = record
+        self.t0 = self.lap = time.perf_counter()
+
+
+class Instrumentation:
+    """Records RunRecords into a ring buffer and keeps running totals."""
+
+    def __init__(self, enabled: bool = False, capacity: int = 256):
+        self.enabled = enabled
+        self.recent: "deque[RunRecord]" = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # kind -> [runs, seconds, elements, messages, bytes]
+        self._runs = defaultdict(lambda: [0, 0.0, 0, 0, 0])
+        # label -> [count, seconds]
+        self._sections = defaultdict(lambda: [0, 0.0])
+        self._gauges: Dict[str, Callable[[], dict]] = {}
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        port = os.environ.get("QUIZ_METRICS_PORT")
+        enabled = bool(port) or os.environ.get("QUIZ_METRICS", "").lower() in ("1", "true", "on")
+        inst = cls(enabled=enabled, capacity=int(os.environ.get("QUIZ_METRICS_RUNS", "256")))
+        if enabled and port:
+            MetricsServer(inst, os.environ.get("QUIZ_METRICS_HOST", "127.0.0.1"), int(port)).start()
+        return inst
+
+    # -- run boundaries ------------------------------------------------
+    def begin_run(self, kind: str = "script"):
+        if not self.enabled:
+            return
+        stale = getattr(self._local, "active", None)
+        if stale is not None:
+            # The previous run never reached end_run (st.stop, rerun, error)
+            self._finish(stale, finished=False)
+        active = self._local.active = _Active(RunRecord(kind, time.time()))
+        for label, seconds in self._take_carried():
+            active.record.add_section(label, seconds)
+        self._count_messages()
+
+    def end_run(self, finished: bool = True):
+        if not self.enabled:
+            return
+        active = getattr(self._local, "active", None)
+        if active is not None:
+            self._finish(active, finished=finished)
+
+    def _finish(self, active: _Active, finished: bool):
+        self._local.active = None
+        r = active.record
+        r.seconds = time.perf_counter() - active.t0
+        r.finished = finished
+        with self._lock:
+            self.recent.append(r)
+            totals = self._runs[r.kind]
+            totals[0] += 1
+            totals[1] += r.seconds
+            totals[2] += r.elements
+            totals[3] += r.messages
+            totals[4] += r.bytes
+            for label, seconds in r.sections.items():
+                s = self._sections[label]
+                s[0] += 1
+                s[1] += seconds
+
+    def _take_carried(self) -> List[Tuple[str, float]]:
+        carried = getattr(self._local, "carried", None)
+        self._local.carried = []
+        return carried or []
+
+    def _count_messages(self):
+        """Wrap this session's enqueue so every ForwardMsg is tallied once."""
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is None or getattr(ctx._enqueue, "_quiz_metrics", None) is self:
+            return
+        enqueue = ctx._enqueue
+        local = self._local
+
+        def counting_enqueue(msg):
+            active = getattr(local, "active", None)
+            if active is not None:
+                r = active.record
+                r.messages += 1
+                r.bytes += msg.ByteSize()
+                if msg.WhichOneof("type") == "delta":
+                    kind = msg.delta.WhichOneof("type")
+                    if kind == "new_element":
+                        r.elements += 1
+                    elif kind == "add_block":
+                        r.blocks += 1
+            enqueue(msg)
+
+        counting_enqueue._quiz_metrics = self
+        ctx._enqueue = counting_enqueue
+
+    # -- sections ------------------------------------------------------
+    def lap(self, label: str):
+        """Charge the time since the run started (or the last lap) to label."""
+        if not self.enabled:
+            return
+        active = getattr(self._local, "active", None)
+        if active is not None:
+            now = time.perf_counter()
+            active.record.add_section(label, now - active.lap)
+            active.lap = now
+
+    def section(self, label: str):
+        """Context manager timing one block of the current run."""
+        if not self.enabled:
+            return _NULL
+        return self._section(label)
+
+    @contextmanager
+    def _section(self, label: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            active = getattr(self._local, "active", None)
+            if active is not None:
+                active.record.add_section(label, seconds)
+            else:
+                if not hasattr(self._local, "carried"):
+                    self._local.carried = []
+                self._local.carried.append((label, seconds))
+
+    def timed(self, label: str):
+        """Decorator for a fragment function (see the module docstring)."""
+
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                ctx = get_script_run_ctx(suppress_warning=True)
+                if ctx is not None and ctx.fragment_ids_this_run:
+                    self.begin_run(f"fragment:{label}")
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        self.end_run()
+                with self._section(label):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    # -- reporting -----------------------------------------------------
+    def register_gauges(self, prefix: str, fn: Callable[[], dict]):
+        """Export fn()'s numeric values as <prefix>_<key> gauges (idempotent)."""
+        self._gauges[prefix] = fn
+
+    def _gauge_values(self) -> Dict[str, float]:
+        values = {}
+        for prefix, fn in list(self._gauges.items()):
+            for key, value in fn().items():
+                if isinstance(value, (int, float)):
+                    values[f"{prefix}_{key}"] = value
+        return values
+
+    def snapshot(self, last: Optional[int] = None) -> dict:
+        with self._lock:
+            recent = list(self.recent)
+            runs = {k: list(v) for k, v in self._runs.items()}
+            sections = {k: list(v) for k, v in self._sections.items()}
+        if last is not None:
+            recent = recent[-last:]
+        return {
+            "enabled": self.enabled,
+            "runs": {
+                kind: {"count": n, "seconds": s, "elements": e, "messages": m, "bytes": b}
+                for kind, (n, s, e, m, b) in sorted(runs.items())
+            },
+            "sections": {
+                label: {"count": n, "seconds": s} for label, (n, s) in sorted(sections.items())
+            },
+            "gauges": self._gauge_values(),
+            "recent": [asdict(r) for r in recent],
+        }
+
+    def prometheus(self) -> str:
+        snap = self.snapshot(last=0)
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        runs = snap["runs"]
+        family("quiz_runs_total", "counter", "Script and fragment runs recorded.",
+               [f'quiz_runs_total{{kind="{k}"}} {v["count"]}' for k, v in runs.items()])
+        family("quiz_run_seconds_total", "counter", "Wall time spent in runs.",
+               [f'quiz_run_seconds_total{{kind="{k}"}} {v["seconds"]:.6f}' for k, v in runs.items()])
+        family("quiz_run_elements_total", "counter", "Elements sent by runs.",
+               [f'quiz_run_elements_total{{kind="{k}"}} {v["elements"]}' for k, v in runs.items()])
+        family("quiz_run_messages_total", "counter", "ForwardMsgs sent by runs.",
+               [f'quiz_run_messages_total{{kind="{k}"}} {v["messages"]}' for k, v in runs.items()])
+        family("quiz_run_bytes_total", "counter", "Serialized ForwardMsg bytes sent by runs.",
+               [f'quiz_run_bytes_total{{kind="{k}"}} {v["bytes"]}' for k, v in runs.items()])
+        sections = snap["sections"]
+        family("quiz_section_seconds_total", "counter", "Wall time per labelled section.",
+               [f'quiz_section_seconds_total{{section="{k}"}} {v["seconds"]:.6f}' for k, v in sections.items()])
+        family("quiz_section_calls_total", "counter", "Runs that entered each labelled section.",
+               [f'quiz_section_calls_total{{section="{k}"}} {v["count"]}' for k, v in sections.items()])
+        for name, value in sorted(snap["gauges"].items()):
+            family(f"quiz_{name}", "gauge", name.replace("_", " ") + ".", [f"quiz_{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+
+# -------------------------------
+# HTTP endpoint
+# -------------------------------
+class MetricsHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        inst = self.server.instrumentation
+        if path == "/metrics":
+            body = inst.prometheus().encode("utf-8")
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(inst.snapshot()).encode("utf-8")
+            ctype = "application/json"
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serves /metrics (Prometheus text) and /metrics.json for one Instrumentation."""
+
+    daemon_threads = True
+
+    def __init__(self, instrumentation: Instrumentation, host: str = "127.0.0.1", port: int = 9464):
+        super().__init__((host, port), MetricsHandler)
+        self.instrumentation = instrumentation
+        self._thread = None
+
+    def start(self) -> "MetricsServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.serve_forever, name="quiz-metrics-server", daemon=True
+            )
+            self._thread.start()
+        return self
@@ -0,0 +1,126 @@
+"""
+Answer normalization for every script, not just Latin-1.
+
+A guess and an accepted answer match when they normalize to the same string:
+caseless, compatibility-normalized (NFKC, so full-width "ＰＩＡＮＯ" is "piano"),
+punctuation and symbols turned into spaces, whitespace collapsed. Letters,
+digits and combining marks of any script are kept, so Greek, Cyrillic, CJK
+and Devanagari answers survive intact. Curly apostrophes become "'" and every
+dash becomes "-".
+
+Each Normalizer owns a str.translate table keyed by code point. ASCII is
+filled in up front, and any other code point is classified once with
+unicodedata the first time it is seen, then served from the table.
+
+Most guesses are Latin-1 once casefolded and normalized. Those go through
+bytes.translate with a precomputed 256-byte table, accent folding included.
+That beats str.translate, which looks every character up in the dict.
+
+Packs can set "locale" (Turkish and Azerbaijani fold I/İ to ı/i) and
+"fold_accents": true (café == cafe). get_normalizer caches one Normalizer per
+combination for the whole process.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional, Union
+
+APOSTROPHES = "'‘’ʼ＇"
+# Generic diacritics shared by Latin, Greek and Cyrillic. Script-specific
+# marks (Devanagari vowel signs, Hebrew points, ...) carry meaning and stay.
+DIACRITICS = (
+    (0x0300, 0x036F),
+    (0x1AB0, 0x1AFF),
+    (0x1DC0, 0x1DFF),
+    (0x20D0, 0x20FF),
+    (0xFE20, 0xFE2F),
+)
+# Languages whose dotted and dotless i do not follow Unicode's default casing
+DOTLESS_I = {"tr", "az"}
+
+
+def _is_diacritic(cp: int) -> bool:
+    return any(lo <= cp <= hi for lo, hi in DIACRITICS)
+
+
+class _Table(dict):
+    """str.translate table that classifies a code point on first lookup."""
+
+    def __init__(self, fold_accents: bool):
+        super().__init__()
+        self.fold_accents = fold_accents
+        for cp in range(128):
+            self[cp] = self._classify(cp)
+
+    def __missing__(self, cp: int) -> Union[int, str, None]:
+        value = self[cp] = self._classify(cp)
+        return value
+
+    def _classify(self, cp: int) -> Union[int, str, None]:
+        ch = chr(cp)
+        if ch in APOSTROPHES:
+            return "'"
+        category = unicodedata.category(ch)
+        if category == "Pd":
+            return "-"
+        if category[0] in "LN":
+            return cp
+        if category[0] == "M":
+            return None if self.fold_accents and _is_diacritic(cp) else cp
+        return " "
+
+
+class Normalizer:
+    def __init__(self, locale: str = "", fold_accents: bool = False):
+        self.locale = locale
+        self.fold_accents = fold_accents
+        self._table = _Table(fold_accents)
+        # Every NFKC-stable Latin-1 character folds to exactly one Latin-1
+        # character. The others (ª, ½, ...) never take the bytes path.
+        self._latin1 = bytes(
+            ord(self._fold(chr(cp)) if unicodedata.is_normalized("NFKC", chr(cp)) else " ")
+            for cp in range(256)
+        )
+        self._casing: Optional[Dict[int, str]] = (
+            {ord("I"): "ı", ord("İ"): "i"} if locale in DOTLESS_I else None
+        )
+
+    def __call__(self, s: str) -> str:
+        if self._casing is not None:
+            s = s.translate(self._casing)
+        s = s.casefold()
+        if s.isascii():
+            return " ".join(s.encode("ascii").translate(self._latin1).decode("ascii").split())
+        if not unicodedata.is_normalized("NFKC", s):
+            s = unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", s).casefold())
+        try:
+            raw = s.encode("latin-1")
+        except UnicodeEncodeError:
+            return " ".join(self._fold(s).split())
+        return " ".join(raw.translate(self._latin1).decode("latin-1").split())
+
+    def _fold(self, s: str) -> str:
+        """Punctuation to spaces, and accents off when folding (s is NFKC)."""
+        if self.fold_accents:
+            s = unicodedata.normalize("NFKD", s).translate(self._table)
+            return unicodedata.normalize("NFC", s)
+        return s.translate(self._table)
+
+    def __repr__(self):
+        return f"Normalizer(locale={self.locale!r}, fold_accents={self.fold_accents})"
+
+
+@lru_cache(maxsize=None)
+def _normalizer(language: str, fold_accents: bool) -> Normalizer:
+    return Normalizer(language, fold_accents)
+
+
+def get_normalizer(locale: str = "", fold_accents: bool = False) -> Normalizer:
+    """The shared Normalizer for a locale ("pt", "tr_TR", "az-Latn", ...)."""
+    language = locale.replace("-", "_").split("_")[0].lower()
+    if language not in DOTLESS_I:
+        language = ""  # every other language shares the default tables
+    return _normalizer(language, bool(fold_accents))
+
+
+normalize_text = get_normalizer()
@@ -0,0 +1,437 @@
+"""
+Quiz packs: riddles loaded from JSON or TOML files instead of code.
+
+A pack file looks like
+
+    {
+      "id": "mariana",
+      "title": "Mariana's Birthday Quiz",
+      "locale": "pt",
+      "fold_accents": false,
+      "riddles": [
+        {"type": "mcq", "question": "...", "options": [...], "answer": "...", "hint": "..."},
+        {"type": "text", "question": "...", "answers": [...], "hint": "...", "tolerance": 1},
+        {"type": "cipher", "cipher": "caesar", "plaintext": "...", "answers": [...], "hint": "... {key}"}
+      ]
+    }
+
+(or the same structure in TOML, with riddles as [[riddles]] tables). locale
+and fold_accents are optional and pick how answers are normalized (see
+quiz/normalize.py).
+
+load_pack validates the file and compiles it into an immutable QuizPack.
+PackWatcher holds the compile for one file, keyed by its mtime and size, and
+swaps in a recompiled pack with a single reference assignment, so readers
+never block and never see a half-built pack. Sessions hold on to the QuizPack
+they started with, which keeps `idx` pointing at the same questions across a
+reload.
+
+PackRegistry serves many quizzes from one process: packs/<quiz id>.json (or
+.toml) is loaded on first request and kept in an LRU bounded by both entry
+count and approximate memory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from quiz.ciphers import CIPHERS, KEYED, MAX_VARIANTS, encode
+from quiz.fuzzy import MAX_TOLERANCE
+from quiz.normalize import Normalizer, get_normalizer, normalize_text
+from quiz.riddles import Riddle, compile_riddles
+
+try:
+    from tomllib import loads as toml_loads
+except ModuleNotFoundError:  # Python < 3.11; toml ships with Streamlit
+    from toml import loads as toml_loads
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKS_DIR = Path(__file__).resolve().parent.parent / "packs"
+DEFAULT_PACK = PACKS_DIR / "mariana.json"
+
+RIDDLE_KEYS = {
+    "mcq": {"type", "question", "options", "answer", "hint"},
+    "text": {"type", "question", "answers", "hint", "tolerance"},
+    "cipher": {"type", "cipher", "plaintext", "encode", "question", "answers", "hint", "tolerance", "key", "variants"},
+}
+
+
+class PackError(ValueError):
+    """A pack file is missing, unreadable or fails validation."""
+
+
+@dataclass(frozen=True)
+class QuizPack:
+    id: str
+    title: str
+    version: str  # content hash of the file
+    riddles: Tuple[Riddle, ...]
+    path: str
+
+    def __len__(self) -> int:
+        return len(self.riddles)
+
+
+# -------------------------------
+# Validation
+# -------------------------------
+def _is_text(v) -> bool:
+    return isinstance(v, str) and bool(v.strip())
+
+
+def validate_riddle(raw, where: str, normalize: Normalizer = normalize_text) -> List[str]:
+    if not isinstance(raw, dict):
+        return [f"{where}: expected a table/object, got {type(raw).__name__}"]
+    kind = raw.get("type")
+    if kind not in RIDDLE_KEYS:
+        return [f"{where}: type must be 'mcq', 'text' or 'cipher', got {kind!r}"]
+
+    problems = []
+    unknown = set(raw) - RIDDLE_KEYS[kind]
+    if unknown:
+        problems.append(f"{where}: unknown keys {sorted(unknown)}")
+    # A cipher riddle's question defaults to its ciphertext
+    if not _is_text(raw.get("question")) and (kind != "cipher" or "question" in raw):
+        problems.append(f"{where}: question must be a non-empty string")
+    if "hint" in raw and not isinstance(raw["hint"], str):
+        problems.append(f"{where}: hint must be a string")
+
+    if kind == "mcq":
+        options = raw.get("options")
+        if not isinstance(options, list) or len(options) < 2 or not all(_is_text(o) for o in options):
+            problems.append(f"{where}: options must be a list of at least two strings")
+        elif len(set(options)) != len(options):
+            problems.append(f"{where}: options contain duplicates")
+        elif raw.get("answer") not in options:
+            problems.append(f"{where}: answer {raw.get('answer')!r} is not one of the options")
+    elif kind == "cipher":
+        problems.extend(validate_cipher(raw, where))
+    if kind == "text" or (kind == "cipher" and "encode" not in raw):
+        answers = raw.get("answers")
+        if not isinstance(answers, list) or not answers or not all(_is_text(a) for a in answers):
+            problems.append(f"{where}: answers must be a non-empty list of strings")
+    if kind != "mcq":
+        tolerance = raw.get("tolerance", 0)
+        if type(tolerance) is not int or not 0 <= tolerance <= MAX_TOLERANCE:
+            problems.append(f"{where}: tolerance must be an integer from 0 to {MAX_TOLERANCE}")
+    if kind != "mcq" and not problems:
+        # An answer that normalizes to "" could only match an empty guess
+        answers = [encode(raw["cipher"], raw["encode"], raw.get("key"))] if "encode" in raw else raw["answers"]
+        for answer in answers:
+            if not normalize(answer):
+                problems.append(f"{where}: answer {answer!r} is empty once normalized")
+    return problems
+
+
+def validate_cipher(raw: dict, where: str) -> List[str]:
+    cipher = raw.get("cipher")
+    if cipher not in CIPHERS:
+        return [f"{where}: cipher must be one of {', '.join(CIPHERS)}, got {cipher!r}"]
+    problems = []
+    if ("plaintext" in raw) == ("encode" in raw):
+        problems.append(f"{where}: give exactly one of plaintext (to decode) or encode (to type)")
+    elif not _is_text(raw.get("plaintext", raw.get("encode"))):
+        problems.append(f"{where}: {'plaintext' if 'plaintext' in raw else 'encode'} must be a non-empty string")
+    elif "encode" in raw:
+        if "answers" in raw:
+            problems.append(f"{where}: the answer to an encode riddle is the encoding; drop answers")
+        if not _is_text(raw.get("question")):
+            problems.append(f"{where}: an encode riddle needs a question")
+        if cipher in KEYED and "key" not in raw:
+            problems.append(f"{where}: an encode riddle with {cipher} needs a fixed key")
+    key = raw.get("key")
+    if key is not None:
+        if cipher == "caesar" and not (type(key) is int and 1 <= key <= 25):
+            problems.append(f"{where}: caesar key must be an integer from 1 to 25")
+        elif cipher == "vigenere" and not (isinstance(key, str) and key.isascii() and key.isalpha()):
+            problems.append(f"{where}: vigenere key must be a word of A-Z letters")
+        elif cipher not in KEYED:
+            problems.append(f"{where}: {cipher} takes no key")
+    variants = raw.get("variants")
+    if variants is not None and not (type(variants) is int and 1 <= variants <= MAX_VARIANTS):
+        problems.append(f"{where}: variants must be an integer from 1 to {MAX_VARIANTS}")
+    return problems
+
+
+def validate_pack(data, source: str = "<pack>") -> List[str]:
+    """Return every problem found in a parsed pack (empty list when valid)."""
+    if not isinstance(data, dict):
+        return [f"{source}: top level must be a table/object"]
+    problems = []
+    for key in ("id", "title"):
+        if not _is_text(data.get(key)):
+            problems.append(f"{source}: {key} must be a non-empty string")
+    locale, fold_accents = data.get("locale", ""), data.get("fold_accents", False)
+    if "locale" in data and not _is_text(locale):
+        problems.append(f"{source}: locale must be a non-empty string")
+        locale = ""
+    if not isinstance(fold_accents, bool):
+        problems.append(f"{source}: fold_accents must be true or false")
+        fold_accents = False
+    normalize = get_normalizer(locale, fold_accents)
+    riddles = data.get("riddles")
+    if not isinstance(riddles, list) or not riddles:
+        problems.append(f"{source}: riddles must be a non-empty list")
+        return problems
+    for i, raw in enumerate(riddles, start=1):
+        problems.extend(validate_riddle(raw, f"{source}: riddle #{i}", normalize))
+    return problems
+
+
+# -------------------------------
+# Loading
+# -------------------------------
+def parse_pack(raw: bytes, path: Path) -> dict:
+    try:
+        text = raw.decode("utf-8")
+        if path.suffix.lower() == ".toml":
+            return toml_loads(text)
+        return json.loads(text)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise PackError(f"{path}: cannot parse: {e}") from e
+
+
+def compile_pack(data: dict, version: str, path: str) -> QuizPack:
+    return QuizPack(
+        id=data["id"],
+        title=data["title"],
+        version=version,
+        riddles=compile_riddles(
+            data["riddles"],
+            get_normalizer(data.get("locale", ""), data.get("fold_accents", False)),
+        ),
+        path=path,
+    )
+
+
+def load_pack(path=DEFAULT_PACK) -> QuizPack:
+    """Load, validate and compile a pack file."""
+    p = Path(path).resolve()
+    try:
+        raw = p.read_bytes()
+    except OSError as e:
+        raise PackError(f"{p}: {e.strerror}") from e
+    data = parse_pack(raw, p)
+    problems = validate_pack(data, p.name)
+    if problems:
+        raise PackError("\n".join(problems))
+    return compile_pack(data, hashlib.sha256(raw).hexdigest()[:12], str(p))
+
+
+def pack_size(obj, _seen=None) -> int:
+    """Approximate deep size in bytes of a compiled pack (or any part of one)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, frozenset, set)):
+        size += sum(pack_size(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(pack_size(k, seen) + pack_size(v, seen) for k, v in obj.items())
+    elif is_dataclass(obj):
+        size += sum(pack_size(getattr(obj, f.name), seen) for f in fields(obj))
+    return size
+
+
+# -------------------------------
+# Hot reload
+# -------------------------------
+class PackWatcher:
+    """Keeps the latest good compile of one pack file and reloads it on change."""
+
+    def __init__(self, path=DEFAULT_PACK, interval: float = 2.0):
+        self.path = Path(path).resolve()
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self._stamp = self._stat()
+        self._current = load_pack(self.path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self) -> QuizPack:
+        return self._current
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def poll(self) -> bool:
+        """Reload if the file changed; returns True when a new pack was swapped in."""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            pack = load_pack(self.path)
+        except PackError as e:
+            # Keep serving the last good pack
+            self.last_error = str(e)
+            _LOGGER.warning("Quiz pack reload failed, keeping version %s:\n%s", self._current.version, e)
+            return False
+        self.last_error = None
+        if pack.version == self._current.version:
+            return False
+        self._current = pack
+        _LOGGER.info("Quiz pack %s reloaded: version %s", pack.id, pack.version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "PackWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"quiz-pack-watcher:{self.path.name}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+# -------------------------------
+# Multi-quiz registry
+# -------------------------------
+QUIZ_ID_RE = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+
+class UnknownQuiz(PackError):
+    """No pack file exists for the requested quiz id."""
+
+
+class PackRegistry:
+    """Quiz id -> PackWatcher, loaded lazily and kept in a bounded LRU."""
+
+    def __init__(
+        self,
+        packs_dir=PACKS_DIR,
+        max_packs: int = 32,
+        max_bytes: int = 64 * 1024 * 1024,
+        interval: float = 2.0,
+    ):
+        self.packs_dir = Path(packs_dir).resolve()
+        self.max_packs = max_packs
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.hits = self.misses = self.evictions = 0
+        self._entries: "OrderedDict[str, PackWatcher]" = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "PackRegistry":
+        return cls(
+            packs_dir=os.environ.get("QUIZ_PACKS_DIR", PACKS_DIR),
+            max_packs=int(os.environ.get("QUIZ_CACHE_PACKS", "32")),
+            max_bytes=int(float(os.environ.get("QUIZ_CACHE_MB", "64")) * 1024 * 1024),
+        )
+
+    def path_for(self, quiz_id: str) -> Path:
+        if not isinstance(quiz_id, str) or not QUIZ_ID_RE.fullmatch(quiz_id):
+            raise UnknownQuiz(f"Invalid quiz id {quiz_id!r}")
+        for suffix in (".json", ".toml"):
+            path = self.packs_dir / f"{quiz_id}{suffix}"
+            if path.is_file():
+                return path
+        raise UnknownQuiz(f"No quiz pack named {quiz_id!r}")
+
+    def get(self, quiz_id: str) -> QuizPack:
+        """Current compiled pack for a quiz, loading it on first request."""
+        with self._lock:
+            watcher = self._entries.get(quiz_id)
+            if watcher is not None:
+                self._entries.move_to_end(quiz_id)
+                self.hits += 1
+                return watcher.current
+            self.misses += 1
+
+        # Compile outside the lock so other quizzes keep being served
+        watcher = PackWatcher(self.path_for(quiz_id), self.interval)
+        with self._lock:
+            existing = self._entries.get(quiz_id)
+            if existing is not None:
+                # Another session loaded it while we were compiling
+                return existing.current
+            self._entries[quiz_id] = watcher
+            self._sizes[quiz_id] = pack_size(watcher.current)
+            self._evict()
+        return watcher.current
+
+    def _evict(self):
+        # Always keep the most recently used entry, even if it alone is over budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_packs or sum(self._sizes.values()) > self.max_bytes
+        ):
+            quiz_id, _ = self._entries.popitem(last=False)
+            del self._sizes[quiz_id]
+            self.evictions += 1
+
+    def poll(self):
+        """Reload any cached pack whose file changed."""
+        with self._lock:
+            watchers = list(self._entries.items())
+        for quiz_id, watcher in watchers:
+            if watcher.poll():
+                with self._lock:
+                    if self._entries.get(quiz_id) is watcher:
+                        self._sizes[quiz_id] = pack_size(watcher.current)
+                        self._evict()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "PackRegistry":
+        """Start one background thread that hot-reloads every cached pack."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="quiz-pack-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._sizes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_DEFAULT_REGISTRY: Optional[PackRegistry] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_registry() -> PackRegistry:
+    """The process-wide registry (from the environment, reload thread running).
+
+    Shared by the app and the startup prewarm, so packs compiled before the
+    first session are the ones sessions get.
+    """
+    global _DEFAULT_REGISTRY
+    with _DEFAULT_LOCK:
+        if _DEFAULT_REGISTRY is None:
+            _DEFAULT_REGISTRY = PackRegistry.from_env().start()
+        return _DEFAULT_REGISTRY
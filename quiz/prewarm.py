@@ -0,0 +1,176 @@
+"""
+Startup prewarm: do the first visitor's work before they arrive.
+
+The first session after a deploy used to pay for everything at once:
+- hashing the hero video (or base64-encoding it in inline mode)
+- building the stylesheet
+- compiling the quiz pack, with its answer indexes and cipher variants
+
+start() runs those steps on a background thread instead. It fills the same
+process-wide caches the app reads from: assets' digest and data-URI caches,
+build's output files, and packs.default_registry().
+
+Launch through the wrapper so warming starts when the server process boots,
+before any session connects:
+
+    python -m quiz.serve [streamlit run options]
+
+With plain `streamlit run` the app calls start() itself on the first
+session, which still takes the work off that session's render path.
+
+Readiness: Prewarm.ready is set once every step has finished (a failed
+step is logged and left to the app to redo lazily). QUIZ_HEALTH_PORT starts
+an endpoint on QUIZ_HEALTH_HOST (127.0.0.1) where /ready answers 503 while
+warming and 200 after, with the step timings as JSON. /healthz always
+answers 200. The app also exports prewarm_ready as a metrics gauge.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from quiz import assets, build
+from quiz.packs import default_registry
+
+_LOGGER = logging.getLogger(__name__)
+
+VIDEO_PATH = assets.APP_DIR / "seavid.mp4"
+
+Step = Tuple[str, Callable[[], object]]
+
+
+def warm_video():
+    mode = os.environ.get("QUIZ_ASSET_MODE", "static")
+    if mode == "inline":
+        assets.data_uri(VIDEO_PATH)
+    elif mode == "server":
+        assets.file_digest(VIDEO_PATH)  # the asset server registers it per process
+    else:
+        assets.publish_static(VIDEO_PATH)
+
+
+def warm_packs():
+    quizzes = [os.environ.get("QUIZ_DEFAULT", "mariana")]
+    quizzes += [q.strip() for q in os.environ.get("QUIZ_PREWARM", "").split(",") if q.strip()]
+    registry = default_registry()
+    for quiz_id in dict.fromkeys(quizzes):
+        registry.get(quiz_id)
+
+
+def app_steps() -> List[Step]:
+    return [("styles", build.ensure_styles), ("video", warm_video), ("packs", warm_packs)]
+
+
+class Prewarm:
+    """Runs warm-up steps once, in order, on a daemon thread."""
+
+    def __init__(self, steps: List[Step]):
+        self.steps = steps
+        self.ready = threading.Event()
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread = None
+
+    def start(self) -> "Prewarm":
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="quiz-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for name, fn in self.steps:
+                t0 = time.perf_counter()
+                try:
+                    fn()
+                except Exception as e:  # a cold cache is not worth a crash
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    _LOGGER.warning("prewarm step %s failed: %s", name, e)
+                self.timings[name] = round(time.perf_counter() - t0, 4)
+        finally:
+            self.finished_at = time.time()
+            self.ready.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready.is_set(),
+            "steps": self.timings,
+            "errors": self.errors,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 4) if self.started_at else 0.0,
+        }
+
+    def stats(self) -> dict:
+        return {"ready": int(self.ready.is_set()), "errors": len(self.errors), "seconds": self.status()["seconds"]}
+
+
+# -------------------------------
+# Health endpoint
+# -------------------------------
+class HealthHandler(BaseHTTPRequestHandler):
+    server: "HealthServer"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            self._send(HTTPStatus.OK, {"ok": True})
+        elif path == "/ready":
+            status = self.server.prewarm.status()
+            self._send(HTTPStatus.OK if status["ready"] else HTTPStatus.SERVICE_UNAVAILABLE, status)
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def _send(self, code: HTTPStatus, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # probes every few seconds would flood the console
+
+
+class HealthServer(ThreadingHTTPServer):
+    """Serves /ready and /healthz for one Prewarm."""
+
+    daemon_threads = True
+
+    def __init__(self, prewarm: Prewarm, host: str = "127.0.0.1", port: int = 8503):
+        super().__init__((host, port), HealthHandler)
+        self.prewarm = prewarm
+        self._thread = None
+
+    def start(self) -> "HealthServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="quiz-health-server", daemon=True)
+            self._thread.start()
+        return self
+
+
+_PREWARM: Optional[Prewarm] = None
+_LOCK = threading.Lock()
+
+
+def start(steps: Optional[List[Step]] = None) -> Prewarm:
+    """Start the process-wide prewarm once (later calls return the same one)."""
+    global _PREWARM
+    with _LOCK:
+        if _PREWARM is None:
+            _PREWARM = Prewarm(steps if steps is not None else app_steps()).start()
+            port = os.environ.get("QUIZ_HEALTH_PORT")
+            if port:
+                HealthServer(_PREWARM, os.environ.get("QUIZ_HEALTH_HOST", "127.0.0.1"), int(port)).start()
+        return _PREWARM
@@ -0,0 +1,283 @@
+"""
+On-demand profiling of single script runs.
+
+Profiling is opt-in per session:
+- QUIZ_PROFILE_KEY=<secret> lets a session that opens the app with
+  ?profile=<secret> profile its own runs. Every other session keeps running
+  without a profiler installed.
+- QUIZ_PROFILE=1 profiles every run of every session (local debugging only).
+
+Each profiled run (the full script, or a fragment-only rerun) is written to
+QUIZ_PROFILE_DIR (default ./profiles). Two formats are supported:
+- "cprofile" writes a pstats file. Before Python 3.12 cProfile hooks only
+  the thread it is enabled on, so other sessions are unaffected. From 3.12 on
+  it uses sys.monitoring, which is process-wide, so "sample" is the default
+  there. Only one cProfile runs at a time in a process; a run that would
+  start a second one goes unprofiled instead of failing.
+- "sample" polls the run's stack every QUIZ_PROFILE_INTERVAL seconds from a
+  helper thread and writes a speedscope JSON file (https://speedscope.app).
+
+Pick one with QUIZ_PROFILE_MODE or ?profile_mode=.
+
+Only the newest QUIZ_PROFILE_KEEP files (50) are kept; older ones are
+deleted after every write.
+"""
+
+import cProfile
+import functools
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+_LOGGER = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PROFILE_DIR = APP_DIR / "profiles"
+MODES = ("cprofile", "sample")
+DEFAULT_MODE = "cprofile" if sys.version_info < (3, 12) else "sample"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Held while a cProfile.Profile is enabled. On 3.12+ a second enable() in the
+# process raises "Another profiling tool is already active".
+_CPROFILE_LOCK = threading.Lock()
+
+
+# -------------------------------
+# Sampling profiler
+# -------------------------------
+class StackSampler:
+    """Samples one thread's Python stack from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[Tuple[str, str, int]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="quiz-profile-sampler", daemon=True)
+
+    def _index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        i = self._frame_index.get(key)
+        if i is None:
+            i = self._frame_index[key] = len(self.frames)
+            self.frames.append(key)
+        return i
+
+    def _run(self):
+        last = self.started
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(self._index(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()  # speedscope wants root first
+                self.samples.append(stack)
+                self.weights.append(now - last)
+            last = now
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def speedscope(self, name: str) -> dict:
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "quiz.profiling",
+            "shared": {
+                "frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames],
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.elapsed,
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+# -------------------------------
+# Per-run profiling
+# -------------------------------
+class _Active:
+    __slots__ = ("label", "session", "mode", "profiler", "sampler")
+
+    def __init__(self, label: str, session: str, mode: str):
+        self.label = label
+        self.session = session
+        self.mode = mode
+        self.profiler = None
+        self.sampler = None
+
+
+class RunProfiler:
+    """Profiles whole script runs for the sessions that asked for it."""
+
+    def __init__(
+        self,
+        key: Optional[str] = None,
+        always: bool = False,
+        mode: str = DEFAULT_MODE,
+        directory=PROFILE_DIR,
+        keep: int = 50,
+        interval: float = 0.001,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+        self.key = key
+        self.always = always
+        self.mode = mode
+        self.directory = Path(directory)
+        self.keep = keep
+        self.interval = interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RunProfiler":
+        return cls(
+            key=os.environ.get("QUIZ_PROFILE_KEY") or None,
+            always=os.environ.get("QUIZ_PROFILE", "").lower() in ("1", "true", "on"),
+            mode=os.environ.get("QUIZ_PROFILE_MODE", DEFAULT_MODE),
+            directory=os.environ.get("QUIZ_PROFILE_DIR", PROFILE_DIR),
+            keep=int(os.environ.get("QUIZ_PROFILE_KEEP", "50")),
+            interval=float(os.environ.get("QUIZ_PROFILE_INTERVAL", "0.001")),
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.always or self.key is not None
+
+    def wanted(self, param: Optional[str]) -> bool:
+        """Whether a session with this ?profile= value should be profiled."""
+        if self.always:
+            return True
+        if self.key is None or not param:
+            return False
+        return hmac.compare_digest(param.encode("utf-8"), self.key.encode("utf-8"))
+
+    # -- run boundaries ------------------------------------------------
+    def begin(self, label: str = "script") -> bool:
+        """Start profiling this run if the session asked for it."""
+        if not self.available:
+            return False
+        stale = getattr(self._local, "active", None)
+        if stale is not None:
+            # The previous run stopped early (st.stop, rerun); keep what it has
+            self.end()
+        if not self.wanted(st.query_params.get("profile")):
+            return False
+        mode = st.query_params.get("profile_mode", self.mode)
+        ctx = get_script_run_ctx(suppress_warning=True)
+        session = ctx.session_id if ctx is not None else "nosession"
+        active = _Active(label, session, mode if mode in MODES else self.mode)
+        if active.mode == "sample":
+            active.sampler = StackSampler(threading.get_ident(), self.interval).start()
+        else:
+            if not _CPROFILE_LOCK.acquire(blocking=False):
+                _LOGGER.info("Skipping profile of %s: another cProfile run is active", label)
+                return False
+            active.profiler = cProfile.Profile()
+            try:
+                active.profiler.enable()
+            except ValueError as e:  # a debugger or coverage tool owns the hooks
+                _CPROFILE_LOCK.release()
+                _LOGGER.info("Skipping profile of %s: %s", label, e)
+                return False
+        self._local.active = active
+        return True
+
+    def end(self) -> Optional[Path]:
+        active = getattr(self._local, "active", None)
+        if active is None:
+            return None
+        self._local.active = None
+        if active.profiler is not None:
+            active.profiler.disable()
+            _CPROFILE_LOCK.release()
+        else:
+            active.sampler.stop()
+        try:
+            return self._save(active)
+        except OSError as e:
+            _LOGGER.warning("Could not save profile for %s: %s", active.label, e)
+            return None
+
+    def profiled(self, label: str):
+        """Decorator: profile fragment-only reruns of a fragment.
+
+        A full run is already covered by begin()/end(), so the fragment is
+        only profiled on its own when no run is being profiled.
+        """
+
+        def decorate(fn):
+            if not self.available:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                ctx = get_script_run_ctx(suppress_warning=True)
+                if ctx is None or not ctx.fragment_ids_this_run or not self.begin(f"fragment-{label}"):
+                    return fn(*args, **kwargs)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.end()
+
+            return wrapper
+
+        return decorate
+
+    # -- output --------------------------------------------------------
+    def _save(self, active: _Active) -> Path:
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        stem = f"{stamp}-{active.session[:8]}-{active.label}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if active.profiler is not None:
+            path = self.directory / f"{stem}.prof"
+            active.profiler.dump_stats(path)
+        else:
+            path = self.directory / f"{stem}.speedscope.json"
+            path.write_text(json.dumps(active.sampler.speedscope(stem)), encoding="utf-8")
+        self._prune()
+        _LOGGER.info("Saved profile %s", path)
+        return path
+
+    def _prune(self):
+        with self._write_lock:
+            files = [p for p in self.directory.iterdir() if p.suffix in (".prof", ".json")]
+            if len(files) <= self.keep:
+                return
+            files.sort(key=lambda p: p.stat().st_mtime_ns)
+            for old in files[: len(files) - self.keep]:
+                try:
+                    old.unlink()
+                except FileNotFoundError:
+                    pass  # pruned by another thread
@@ -0,0 +1,297 @@
+"""
+Server-side progress storage.
+
+A player is identified by the ?player=<id> query parameter, so a bookmarked
+URL brings back their full stats for each quiz, not just the riddle index.
+
+Backends share the small ProgressStore interface and are picked with
+QUIZ_PROGRESS_STORE:
+- "sqlite:///path/to/progress.db" (default: progress.db next to the app)
+- "memory:" for a process-local dict, handy for tests and demos
+- "none" to disable server-side progress
+
+The SQLite store runs in WAL mode and never writes on the render thread:
+save() only records the latest Progress per (player, quiz) in a pending map,
+and a writer thread flushes that map in one transaction every
+flush_interval seconds. A burst of submissions from one player collapses
+into a single row write, and many players share one commit/fsync.
+
+A failed write (disk full, locked database) is logged and the batch goes
+back into the pending map, where newer saves win. The writer retries every
+retry_interval seconds. While writes keep failing, the map is capped at
+max_pending entries and the oldest are dropped. stats() reports errors and
+drops.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_URL = f"sqlite:///{APP_DIR / 'progress.db'}"
+
+_LOGGER = logging.getLogger(__name__)
+
+Key = Tuple[str, str]  # (player id, quiz id)
+
+
+@dataclass(frozen=True)
+class Progress:
+    pack_version: str
+    idx: int
+    tries: int
+    total_attempts: int
+    perfect_solves: int
+
+    @property
+    def accuracy(self) -> float:
+        """Solved / attempts, 0..1."""
+        return min(self.idx / max(self.total_attempts, 1), 1.0)
+
+    @property
+    def plausible(self) -> bool:
+        """Whether play could have produced this: every solve is an attempt."""
+        return 0 <= self.perfect_solves <= self.idx <= self.total_attempts
+
+
+class ProgressStore:
+    """Base class: a store that remembers nothing."""
+
+    def load(self, player_id: str, quiz_id: str) -> Optional[Progress]:
+        return None
+
+    def save(self, player_id: str, quiz_id: str, progress: Progress):
+        pass
+
+    def scan(self) -> Iterator[Tuple[str, str, Progress]]:
+        """Every stored (player id, quiz id, progress); for one-off startup work."""
+        return iter(())
+
+    def flush(self):
+        """Block until every save so far is durable."""
+
+    def stats(self) -> dict:
+        return {}
+
+    def close(self):
+        self.flush()
+
+
+class MemoryProgressStore(ProgressStore):
+    def __init__(self):
+        self._data: Dict[Key, Progress] = {}
+
+    def load(self, player_id, quiz_id):
+        return self._data.get((player_id, quiz_id))
+
+    def save(self, player_id, quiz_id, progress):
+        self._data[(player_id, quiz_id)] = progress
+
+    def scan(self):
+        for (player, quiz), progress in list(self._data.items()):
+            yield player, quiz, progress
+
+
+# -------------------------------
+# SQLite
+# -------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    player_id      TEXT NOT NULL,
+    quiz_id        TEXT NOT NULL,
+    pack_version   TEXT NOT NULL,
+    idx            INTEGER NOT NULL,
+    tries          INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    perfect_solves INTEGER NOT NULL,
+    updated_at     REAL NOT NULL,
+    PRIMARY KEY (player_id, quiz_id)
+) WITHOUT ROWID
+"""
+
+UPSERT = """
+INSERT INTO progress VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player_id, quiz_id) DO UPDATE SET
+    pack_version = excluded.pack_version,
+    idx = excluded.idx,
+    tries = excluded.tries,
+    total_attempts = excluded.total_attempts,
+    perfect_solves = excluded.perfect_solves,
+    updated_at = excluded.updated_at
+"""
+
+SELECT = """
+SELECT pack_version, idx, tries, total_attempts, perfect_solves
+FROM progress WHERE player_id = ? AND quiz_id = ?
+"""
+
+SCAN = """
+SELECT player_id, quiz_id, pack_version, idx, tries, total_attempts, perfect_solves
+FROM progress
+"""
+
+
+def connect(path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the last
+    # batch but never corrupts the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SQLiteProgressStore(ProgressStore):
+    """SQLite (WAL) store with a coalescing background writer."""
+
+    def __init__(self, path, flush_interval: float = 0.25, retry_interval: float = 1.0, max_pending: int = 100_000):
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.max_pending = max_pending
+        self.batches = self.rows_written = self.errors = self.dropped = 0
+
+        self._writer = connect(self.path)
+        self._writer.execute(SCHEMA)
+        self._writer.commit()
+        self._readers = threading.local()
+
+        self._pending: Dict[Key, Progress] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._generation = 0  # bumped by every save
+        self._durable = 0  # generation covered by the last commit
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="quiz-progress-writer", daemon=True)
+        self._thread.start()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = connect(self.path)
+        return conn
+
+    def load(self, player_id, quiz_id):
+        key = (player_id, quiz_id)
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return pending  # read your own writes before they hit disk
+        row = self._reader().execute(SELECT, key).fetchone()
+        return Progress(*row) if row else None
+
+    def scan(self):
+        self.flush()
+        for player, quiz, *row in self._reader().execute(SCAN):
+            yield player, quiz, Progress(*row)
+
+    def save(self, player_id, quiz_id, progress):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("progress store is closed")
+            self._pending[(player_id, quiz_id)] = progress
+            self._generation += 1
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if not self._closed:
+                # Let a burst accumulate into one transaction
+                time.sleep(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                generation = self._generation
+            ok = True
+            if batch:
+                try:
+                    self._write(batch)
+                except (sqlite3.Error, OSError) as e:
+                    ok = False
+                    self._requeue(batch, e)
+            with self._lock:
+                if ok:
+                    self._durable = generation
+                self._flushed.notify_all()
+                if self._closed and (not self._pending or not ok):
+                    if self._pending:
+                        _LOGGER.error("progress store closed with %d unsaved rows", len(self._pending))
+                    return
+            if not ok:
+                time.sleep(self.retry_interval)
+                self._wake.set()
+
+    def _requeue(self, batch: Dict[Key, Progress], error: Exception):
+        """Put a failed batch back; saves made since then win, the oldest rows go first."""
+        with self._lock:
+            self.errors += 1
+            pending = {**batch, **self._pending}
+            overflow = len(pending) - self.max_pending
+            if overflow > 0:
+                for key in list(pending)[:overflow]:
+                    del pending[key]
+                self.dropped += overflow
+            self._pending = pending
+        _LOGGER.warning("progress write of %d rows failed, retrying: %s", len(batch), error)
+
+    def _write(self, batch: Dict[Key, Progress]):
+        now = time.time()
+        rows = [
+            (player, quiz, p.pack_version, p.idx, p.tries, p.total_attempts, p.perfect_solves, now)
+            for (player, quiz), p in batch.items()
+        ]
+        with self._writer:
+            self._writer.executemany(UPSERT, rows)
+        self.batches += 1
+        self.rows_written += len(rows)
+
+    def flush(self):
+        with self._lock:
+            target = self._generation
+            if self._durable >= target or not self._thread.is_alive():
+                return
+            errors = self.errors
+            self._wake.set()
+            # A failed write ends the wait too, rather than blocking until the disk recovers
+            self._flushed.wait_for(
+                lambda: self._durable >= target or self.errors != errors or not self._thread.is_alive()
+            )
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._writer.close()
+
+
+def open_store(url: Optional[str] = None) -> ProgressStore:
+    """Build the store named by a QUIZ_PROGRESS_STORE-style URL."""
+    url = url or os.environ.get("QUIZ_PROGRESS_STORE", DEFAULT_URL)
+    if url == "none":
+        return ProgressStore()
+    if url == "memory:":
+        return MemoryProgressStore()
+    if url.startswith("sqlite:///"):
+        store = SQLiteProgressStore(url[len("sqlite:///"):])
+        atexit.register(store.close)
+        return store
+    raise ValueError(f"Unknown progress store {url!r}")
@@ -0,0 +1,115 @@
+"""
+Submission rate limiting with token buckets.
+
+Every "Submit Answer" press is a script run, and a wrong answer also renders
+the hint expander. Nothing stopped a script, or a frantic player, from
+spending the server's rerun capacity on it. submit_answer() now asks
+SubmitLimiter first. An over-limit press costs a dict lookup. The answer is
+not checked, saved or logged, and the riddle only shows a "slow down" note.
+
+Two buckets must both have a token:
+- per session: QUIZ_SUBMIT_RATE presses per second, bursts of
+  QUIZ_SUBMIT_BURST (defaults 1 and 5);
+- per client IP: QUIZ_IP_RATE and QUIZ_IP_BURST (10 and 50), which covers a
+  script that opens many sessions. Players behind one NAT share it, hence
+  the higher numbers.
+
+A rate of 0 turns that bucket off. Buckets live in an LRU capped at
+max_keys. Entries idle for longer than a refill are dropped as they age
+out. An idle bucket is full anyway, so forgetting it changes nothing.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class TokenBuckets:
+    """One token bucket per key, in bounded memory."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle = burst / rate if rate > 0 else 0.0  # time to refill from empty
+        self.evictions = 0
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # key -> [tokens, updated at]
+
+    def peek(self, key: str, now: float) -> List[float]:
+        """The key's bucket, refilled up to now (created full)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            self._expire(now)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _expire(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated) = next(iter(buckets.items()))
+            if len(buckets) <= self.max_keys and now - updated < self.idle:
+                break
+            del buckets[key]
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SubmitLimiter:
+    """Per-session and per-IP submission limits, checked together."""
+
+    def __init__(
+        self,
+        session_rate: float = 1.0,
+        session_burst: float = 5.0,
+        ip_rate: float = 10.0,
+        ip_burst: float = 50.0,
+        max_keys: int = 100_000,
+    ):
+        self.sessions = TokenBuckets(session_rate, session_burst, max_keys) if session_rate > 0 else None
+        self.ips = TokenBuckets(ip_rate, ip_burst, max_keys) if ip_rate > 0 else None
+        self.allowed = self.throttled_session = self.throttled_ip = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SubmitLimiter":
+        return cls(
+            session_rate=float(os.environ.get("QUIZ_SUBMIT_RATE", "1")),
+            session_burst=float(os.environ.get("QUIZ_SUBMIT_BURST", "5")),
+            ip_rate=float(os.environ.get("QUIZ_IP_RATE", "10")),
+            ip_burst=float(os.environ.get("QUIZ_IP_BURST", "50")),
+        )
+
+    def allow(self, session: str, ip: Optional[str] = None) -> bool:
+        """Take a token from both buckets, or from neither and return False."""
+        now = time.monotonic()
+        with self._lock:
+            s = self.sessions.peek(session, now) if self.sessions is not None else None
+            if s is not None and s[0] < 1:
+                self.throttled_session += 1
+                return False
+            i = self.ips.peek(ip, now) if self.ips is not None and ip else None
+            if i is not None and i[0] < 1:
+                self.throttled_ip += 1
+                return False
+            for bucket in (s, i):
+                if bucket is not None:
+                    bucket[0] -= 1
+            self.allowed += 1
+            return True
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "throttled_session": self.throttled_session,
+            "throttled_ip": self.throttled_ip,
+            "buckets": sum(len(b) for b in (self.sessions, self.ips) if b is not None),
+            "evictions": sum(b.evictions for b in (self.sessions, self.ips) if b is not None),
+        }
@@ -0,0 +1,85 @@
+"""
+Recording play sessions for replay benchmarks.
+
+Set QUIZ_RECORD_KEY=<secret> and open the app with ?record=<secret>. Every
+interaction of that player is appended to QUIZ_RECORD_DIR (default
+./recordings), one JSON object per line in recordings/<player id>.jsonl:
+
+    {"do": "open", "query": {"quiz": "mariana", "player": "Xy...", "progress": "..."}}
+    {"do": "answer", "riddle": 0, "value": "map"}
+    {"do": "choose", "riddle": 3, "value": "Piano"}
+    {"do": "hint", "riddle": 3}
+    {"do": "reset"}
+
+"open" is written when a session starts a quiz, with the URL's query
+parameters. A reload or a bookmarked resume URL therefore shows up as a
+second "open" in the same file. Lines are appended as they happen, so a
+recording is usable up to the last interaction even if the session never
+ends.
+
+benchmarks/replay.py pushes recordings through Streamlit's AppTest and
+compares run counts, latency and bytes against a baseline. The canonical
+recordings live in benchmarks/recordings/.
+"""
+
+import hmac
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+APP_DIR = Path(__file__).resolve().parent.parent
+RECORD_DIR = APP_DIR / "recordings"
+STEPS = ("open", "answer", "choose", "hint", "reset")
+PRIVATE_PARAMS = ("record", "profile", "debug")  # never written to a recording
+
+
+class Recording:
+    """Appends steps to one player's recording file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, step: str, **fields):
+        if step not in STEPS:
+            raise ValueError(f"Unknown recording step {step!r}, expected one of {STEPS}")
+        line = json.dumps({"do": step, **fields}, ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class SessionRecorder:
+    """Hands out Recordings to sessions opened with ?record=<QUIZ_RECORD_KEY>."""
+
+    def __init__(self, key: Optional[str] = None, directory=RECORD_DIR):
+        self.key = key
+        self.directory = Path(directory)
+
+    @classmethod
+    def from_env(cls) -> "SessionRecorder":
+        return cls(
+            key=os.environ.get("QUIZ_RECORD_KEY") or None,
+            directory=os.environ.get("QUIZ_RECORD_DIR", RECORD_DIR),
+        )
+
+    def wanted(self, param: Optional[str]) -> bool:
+        if self.key is None or not param:
+            return False
+        return hmac.compare_digest(param.encode("utf-8"), self.key.encode("utf-8"))
+
+    def recording(self, player: str, param: Optional[str]) -> Optional[Recording]:
+        """This player's recording, or None when the session is not recording."""
+        if not self.wanted(param):
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return Recording(self.directory / f"{player}.jsonl")
+
+
+def open_query(params) -> dict:
+    """The query parameters worth replaying (secrets stripped)."""
+    return {k: params[k] for k in params.keys() if k not in PRIVATE_PARAMS}
+
+
+def load_recording(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
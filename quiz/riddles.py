@@ -0,0 +1,96 @@
+"""
+Compiled riddles and answer checking.
+
+Riddles are written as plain dicts (see packs/). compile_riddles turns them
+into immutable Riddle objects once per process: text answers are normalized
+up front into a frozenset, so checking a submission is one normalize_text
+call and one set lookup instead of re-normalizing every accepted answer.
+normalize_text and its per-locale variants live in quiz/normalize.py.
+Riddles with a "tolerance" also get an AnswerIndex (quiz/fuzzy.py) that is
+only consulted when the exact lookup misses. Cipher riddles (quiz/ciphers.py)
+compile to text riddles whose question and hint can vary per player.
+"""
+
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+from quiz.ciphers import compile_cipher, pick
+from quiz.fuzzy import AnswerIndex
+from quiz.normalize import Normalizer, normalize_text
+
+
+@dataclass(frozen=True)
+class Riddle:
+    type: str  # "mcq" or "text" (cipher riddles compile to "text")
+    question: str
+    hint: str = ""
+    options: Tuple[str, ...] = ()
+    answer: Optional[str] = None  # mcq: the correct option
+    answers: Tuple[str, ...] = ()  # text: accepted answers as written
+    accepted: FrozenSet[str] = frozenset()  # text: normalize(answers)
+    tolerance: int = 0  # text: edits allowed on top of an exact match
+    # text: fuzzy lookup, when tolerance > 0 (derived from accepted)
+    index: Optional[AnswerIndex] = field(default=None, compare=False, repr=False)
+    # text: the pack's normalizer, applied to answers and guesses alike
+    normalize: Normalizer = field(default=normalize_text, compare=False, repr=False)
+    # text: per-player (question, hint) pairs of a randomized cipher riddle
+    variants: Tuple[Tuple[str, str], ...] = field(default=(), compare=False, repr=False)
+
+    def for_player(self, player: str) -> Tuple[str, str]:
+        """The question and hint this player sees."""
+        i = pick(self.variants, player)
+        return (self.question, self.hint) if i is None else self.variants[i]
+
+    def check(self, user_input: Optional[str] = None, selected: Optional[str] = None) -> bool:
+        if self.type == "mcq":
+            return selected == self.answer
+        if not user_input:
+            return False
+        guess = self.normalize(user_input)
+        if not guess:
+            return False  # "?" or "  " must not match an answer that normalizes to ""
+        if guess in self.accepted:
+            return True
+        return self.index is not None and self.index.match(guess, self.tolerance) is not None
+
+
+def compile_riddle(raw: dict, normalize: Normalizer = normalize_text) -> Riddle:
+    if raw["type"] == "mcq":
+        return Riddle(
+            type="mcq",
+            question=raw["question"],
+            hint=raw.get("hint", ""),
+            options=tuple(raw["options"]),
+            answer=raw["answer"],
+        )
+    if raw["type"] == "cipher":
+        answers, variants = compile_cipher(raw)
+        question, hint = variants[0]
+    else:
+        answers, variants = tuple(raw["answers"]), ()
+        question, hint = raw["question"], raw.get("hint", "")
+    # normalize() turns an answer of only punctuation or spaces into "", which
+    # must never be accepted; validate_riddle reports it for pack files
+    accepted = frozenset(n for n in map(normalize, answers) if n)
+    tolerance = raw.get("tolerance", 0)
+    # Numbers are never fuzzy: 1776 is not "almost" 1775
+    fuzzy = [a for a in accepted if not a.replace(" ", "").isdigit()]
+    return Riddle(
+        type="text",
+        question=question,
+        hint=hint,
+        answers=answers,
+        accepted=accepted,
+        tolerance=tolerance,
+        index=AnswerIndex.build(fuzzy) if tolerance and fuzzy else None,
+        normalize=normalize,
+        variants=variants if len(variants) > 1 else (),
+    )
+
+
+def compile_riddles(raw: Iterable[dict], normalize: Normalizer = normalize_text) -> Tuple[Riddle, ...]:
+    return tuple(compile_riddle(r, normalize) for r in raw)
+
+
+def check_answer(riddle: Riddle, user_input=None, selected=None) -> bool:
+    return riddle.check(user_input=user_input, selected=selected)
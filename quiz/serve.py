@@ -0,0 +1,30 @@
+"""
+Run the app with caches warmed at boot.
+
+    python -m quiz.serve [streamlit run options, e.g. --server.port 8501]
+
+Starts the prewarm thread (quiz/prewarm.py), then hands over to
+`streamlit run streamlit_app.py` in the same process. Streamlit executes the
+script in-process, so it finds the pack, asset and stylesheet caches the
+prewarm already filled.
+"""
+
+import sys
+
+from quiz import prewarm
+from quiz.assets import APP_DIR
+
+APP = APP_DIR / "streamlit_app.py"
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    prewarm.start()
+    from streamlit.web import cli  # heavy; imported while the prewarm runs
+
+    sys.argv = ["streamlit", "run", str(APP), *argv]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
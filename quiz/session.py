@@ -0,0 +1,128 @@
+"""
+Per-session quiz state in one compact object.
+
+A session used to carry a dict per quiz (pack, idx, tries, totals, the time
+the riddle was shown, and transient keys such as feedback and notice). On
+top of that it kept two widget keys for every riddle ever answered,
+`<quiz>_answer_<idx>` and `<quiz>_hint_<idx>`. Those were never removed, so
+a session grew with every solve.
+
+Game keeps the same fields in __slots__: no per-instance __dict__, 112
+bytes against the dict's 272. The pinned pack is a reference to the
+registry's shared copy, not a per-session copy. purge_widgets() drops the
+widget keys of riddles the player has moved past. A session then holds a
+fixed set of keys however far they get.
+
+Every Game is tracked in a WeakSet, so stats() can report live sessions
+and bytes per session (measured on a sample) as metrics gauges. The
+benchmark `python benchmarks/bench_session.py --sessions 10000` sizes a host
+for that many concurrent sessions.
+"""
+
+import random
+import sys
+import time
+import weakref
+from typing import Iterable, MutableMapping, Optional
+
+from quiz.packs import QuizPack, pack_size
+from quiz.progress import Progress
+
+_LIVE: "weakref.WeakSet[Game]" = weakref.WeakSet()
+STATS_SAMPLE = 256  # sessions measured per stats() call
+
+
+class Game:
+    """One session's progress through one quiz."""
+
+    __slots__ = (
+        "pack",  # pinned until reset, so a hot reload never shifts idx
+        "idx",  # current riddle index (0-based)
+        "tries",  # wrong attempts for current riddle
+        "total_attempts",  # total attempts across all riddles
+        "perfect_solves",  # riddles solved on first try
+        "shown_at",  # when the current riddle appeared
+        "hinted",  # riddle whose hint was already logged, or -1
+        "feedback",  # "correct" | "wrong" | "empty" | "throttled" for the next render, or None
+        "notice",  # one-off message for the stats panel, or None
+        "__weakref__",
+    )
+
+    def __init__(self, pack: QuizPack):
+        self.pack = pack
+        self.idx = self.tries = self.total_attempts = self.perfect_solves = 0
+        self.shown_at = time.time()
+        self.hinted = -1
+        self.feedback = self.notice = None
+        _LIVE.add(self)
+
+    def resume(self, progress: Progress, notice: str):
+        self.idx = progress.idx
+        self.tries = progress.tries
+        self.total_attempts = progress.total_attempts
+        self.perfect_solves = progress.perfect_solves
+        self.notice = notice
+
+    def solve(self, now: float):
+        if self.tries == 0:
+            self.perfect_solves += 1
+        self.total_attempts += self.tries + 1
+        self.idx += 1
+        self.tries = 0
+        self.shown_at = now
+
+    def progress(self) -> Progress:
+        return Progress(self.pack.version, self.idx, self.tries, self.total_attempts, self.perfect_solves)
+
+    def take(self, name: str):
+        """Read a transient field (feedback, notice) and clear it."""
+        value = getattr(self, name)
+        setattr(self, name, None)
+        return value
+
+    def nbytes(self, _seen: Optional[set] = None) -> int:
+        """Deep size, leaving out the shared pack."""
+        seen = _seen if _seen is not None else set()
+        return sys.getsizeof(self) + sum(
+            pack_size(getattr(self, name), seen) for name in self.__slots__[1:-1]
+        )
+
+
+# -------------------------------
+# Widget keys
+# -------------------------------
+def widget_keys(quiz_id: str, idx: int) -> tuple:
+    """Session-state keys of the widgets rendered for one riddle."""
+    return (f"{quiz_id}_answer_{idx}", f"{quiz_id}_hint_{idx}")
+
+
+def purge_widgets(state: MutableMapping, quiz_id: str, indexes: Iterable[int]) -> int:
+    """Drop the widget state of riddles that are no longer shown; returns how many keys."""
+    dropped = 0
+    for idx in indexes:
+        for key in widget_keys(quiz_id, idx):
+            if key in state:
+                del state[key]
+                dropped += 1
+    return dropped
+
+
+# -------------------------------
+# Sizing
+# -------------------------------
+def session_bytes(state: MutableMapping) -> int:
+    """Approximate bytes one session's state holds of its own (packs are shared)."""
+    seen: set = set()
+    total = 0
+    for key in list(state.keys()):
+        value = state[key]
+        total += pack_size(key, seen)
+        total += value.nbytes(seen) if isinstance(value, Game) else pack_size(value, seen)
+    return total
+
+
+def stats() -> dict:
+    games = list(_LIVE)
+    sample = random.sample(games, STATS_SAMPLE) if len(games) > STATS_SAMPLE else games
+    per_game = sum(g.nbytes() for g in sample) / len(sample) if sample else 0
+    return {"games": len(games), "bytes_per_game": round(per_game), "bytes": round(per_game * len(games))}
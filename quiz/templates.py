@@ -0,0 +1,187 @@
+"""
+Pre-rendered HTML for the hero, question, stats and completion cards.
+
+Every run used to rebuild these with f-strings. The worst one was the hero,
+whose markup in inline mode embeds a multi-megabyte data URI and was copied
+into a new string on every full rerun. for_pack() compiles a pack's
+fragments once per process and every session shares them:
+
+- Fixed text is rendered once: the progress line for each count, each
+  riddle's number and question (per cipher variant, the first time it is
+  shown), and the hero markup for each video source.
+- The stats and completion cards are a Fragment: the static text split
+  around its slots when the pack loads, so a render only formats the few
+  numbers and joins the parts.
+
+Templates are keyed by (pack id, version), so a hot-reloaded pack gets
+fresh ones. The newest TEMPLATE_PACKS stay cached.
+"""
+
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import Callable, Dict, Sequence, Tuple
+
+from quiz.packs import QuizPack
+
+TEMPLATE_PACKS = 32
+HERO_VARIANTS = 8  # hero markups kept per pack (one per video source in use)
+
+STATS_CARD = """
+        <div class="stats-card">
+            <div class="stat-item">
+                <div class="stat-number">{solved}</div>
+                <div class="stat-label">Riddles Solved</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">{perfect}</div>
+                <div class="stat-label">Perfect Solves</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">{accuracy:.0f}%</div>
+                <div class="stat-label">Accuracy</div>
+            </div>
+        </div>
+        """
+
+COMPLETION_CARD = """
+        <div class="completion-card">
+            <div class="completion-title">🎂 Congratulations, Mariana! 🎂</div>
+            <div class="completion-message">
+                You solved every riddle we're so proud!<br>
+                <br>
+                <strong>Final Score:</strong> {perfect} perfect solves out of {total} riddles<br>
+                <strong>Accuracy:</strong> {accuracy:.0f}%<br>
+                <br>
+                We love you dear, hope you have a great day!<br>
+                <br>
+                Happy Birthday, Amazing! 💖✨
+            </div>
+        </div>
+        """
+
+HERO = """
+    <div class="hero"{style}>
+      {media}
+      <div class="title">
+        <h1>{title}</h1>
+        <p>✨ Solve each riddle to unlock your birthday surprise ✨</p>
+      </div>
+    </div>
+    """
+PLAIN_HERO_STYLE = ' style="background: linear-gradient(135deg, #0ea5e9 0%, #0284c7 100%);"'
+
+
+class Fragment:
+    """A str.format template split once into literal text and slots."""
+
+    __slots__ = ("literals", "slots")
+
+    def __init__(self, template: str, **fixed):
+        self.literals = [""]
+        self.slots = []  # (name, format spec)
+        for literal, name, spec, _ in Formatter().parse(template):
+            self.literals[-1] += literal
+            if name is None:
+                continue
+            if name in fixed:
+                self.literals[-1] += format(fixed[name], spec)
+            else:
+                self.slots.append((name, spec))
+                self.literals.append("")
+
+    def render(self, **values) -> str:
+        out = [self.literals[0]]
+        for (name, spec), literal in zip(self.slots, self.literals[1:]):
+            out.append(format(values[name], spec))
+            out.append(literal)
+        return "".join(out)
+
+
+class PackTemplates:
+    """One pack's pre-rendered fragments, shared by every session."""
+
+    def __init__(self, pack: QuizPack):
+        total = len(pack)
+        self.progress = tuple(
+            f'<div class="progress-text">🎯 Progress: {i} of {total} riddles solved</div>' for i in range(total + 1)
+        )
+        self.numbers = tuple(f'<div class="question-number">Riddle #{i + 1}</div>' for i in range(total))
+        self.stats = Fragment(STATS_CARD)
+        self.completion = Fragment(COMPLETION_CARD, total=total)
+        self._hero = Fragment(HERO, title=pack.title)
+        self._questions: Dict[str, str] = {r.question: self._question(r.question) for r in pack.riddles}
+        self._heroes: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _question(text: str) -> str:
+        return f'<div class="question-text">{text}</div>'
+
+    def question(self, text: str) -> str:
+        """The question card text; cipher variants are rendered on first use."""
+        html = self._questions.get(text)
+        if html is None:
+            html = self._questions.setdefault(text, self._question(text))
+        return html
+
+    def _cached_hero(self, key: tuple, media: Callable[[], str], style: str = "") -> str:
+        # media() only runs on a miss, so a hit never rebuilds the large markup
+        with self._lock:
+            html = self._heroes.get(key)
+            if html is not None:
+                self._heroes.move_to_end(key)
+                return html
+        html = self._hero.render(media=media(), style=style)
+        with self._lock:
+            self._heroes[key] = html
+            while len(self._heroes) > HERO_VARIANTS:
+                self._heroes.popitem(last=False)
+        return html
+
+    def video_hero(self, src: str) -> str:
+        """The single full-size video (src may be a data URI)."""
+        return self._cached_hero(("video", src), lambda: (
+            '<video autoplay muted loop playsinline preload="auto">\n'
+            f'        <source src="{src}" type="video/mp4">\n'
+            "      </video>"
+        ))
+
+    def poster_hero(self, poster: str) -> str:
+        return self._cached_hero(
+            ("poster", poster), lambda: f'<img class="poster" src="{poster}" alt="" fetchpriority="high">'
+        )
+
+    def adaptive_hero(self, poster: str, renditions: Sequence[Tuple[str, str]]) -> str:
+        """Poster plus <source media> renditions (see quiz/media.py)."""
+        renditions = tuple(map(tuple, renditions))
+
+        def media():
+            sources = "".join(f'<source media="{q}" src="{u}" type="video/mp4">' for q, u in renditions)
+            return f'<video autoplay muted loop playsinline preload="none" poster="{poster}">{sources}</video>'
+
+        return self._cached_hero(("adaptive", poster, renditions), media)
+
+    def plain_hero(self) -> str:
+        """No video file: the gradient banner alone."""
+        return self._cached_hero(("plain",), lambda: "", PLAIN_HERO_STYLE)
+
+
+_CACHE: "OrderedDict[Tuple[str, str], PackTemplates]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def for_pack(pack: QuizPack) -> PackTemplates:
+    """The process-wide templates for a pack version, compiled on first use."""
+    key = (pack.id, pack.version)
+    with _LOCK:
+        templates = _CACHE.get(key)
+        if templates is not None:
+            _CACHE.move_to_end(key)
+            return templates
+    templates = PackTemplates(pack)
+    with _LOCK:
+        templates = _CACHE.setdefault(key, templates)
+        while len(_CACHE) > TEMPLATE_PACKS:
+            _CACHE.popitem(last=False)
+    return templates
@@ -0,0 +1,127 @@
+"""
+Signed progress tokens for the URL.
+
+?progress=<token> carries a player's full stats, so any server that knows
+the signing key can resume a session without looking anything up. The
+token is a few bytes, base64url encoded:
+
+    format (1 byte) | idx | tries | total_attempts | perfect_solves
+        | pack version (6 bytes) | HMAC-SHA256 tag (8 bytes)
+
+The four counters are unsigned LEB128 varints capped at MAX_FIELD, so a
+token is at most MAX_TOKEN_CHARS long (36). The quiz id is mixed into the
+MAC but not stored, which stops a token from being replayed on another quiz.
+
+The key comes from QUIZ_TOKEN_SECRET; set the same value on every replica of
+a horizontally scaled deployment. Without it a random key is created once in
+.quiz_token_key next to the app, which is enough for a single host.
+"""
+
+import base64
+import binascii
+import hmac
+import os
+import secrets
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+
+from quiz.progress import Progress
+
+APP_DIR = Path(__file__).resolve().parent.parent
+KEY_FILE = APP_DIR / ".quiz_token_key"
+
+FORMAT = 1
+MAX_FIELD = (1 << 21) - 1  # fits in three varint bytes
+VERSION_BYTES = 6  # first 12 hex chars of the pack hash
+TAG_BYTES = 8
+MAX_RAW = 1 + 4 * 3 + VERSION_BYTES + TAG_BYTES
+MAX_TOKEN_CHARS = (MAX_RAW + 2) // 3 * 4
+
+
+def load_secret() -> bytes:
+    env = os.environ.get("QUIZ_TOKEN_SECRET")
+    if env:
+        return env.encode("utf-8")
+    try:
+        return KEY_FILE.read_bytes()
+    except FileNotFoundError:
+        pass
+    key = secrets.token_bytes(32)
+    try:
+        fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another process created it first
+        return KEY_FILE.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class TokenCodec:
+    """Encodes and verifies progress tokens with one HMAC key."""
+
+    def __init__(self, secret: bytes):
+        # Keyed once; each token only pays for .copy() + update()
+        self._mac = hmac.new(secret, digestmod=sha256)
+
+    def _tag(self, quiz_id: str, body) -> bytes:
+        mac = self._mac.copy()
+        mac.update(quiz_id.encode("utf-8"))
+        mac.update(b"\0")
+        mac.update(body)
+        return mac.digest()[:TAG_BYTES]
+
+    def encode(self, quiz_id: str, p: Progress) -> str:
+        buf = bytearray((FORMAT,))
+        for value in (p.idx, p.tries, p.total_attempts, p.perfect_solves):
+            if not 0 <= value <= MAX_FIELD:
+                raise ValueError(f"progress field out of range: {value}")
+            while value > 0x7F:
+                buf.append((value & 0x7F) | 0x80)
+                value >>= 7
+            buf.append(value)
+        buf += bytes.fromhex(p.pack_version[: VERSION_BYTES * 2].ljust(VERSION_BYTES * 2, "0"))
+        buf += self._tag(quiz_id, buf)
+        return base64.urlsafe_b64encode(buf).rstrip(b"=").decode("ascii")
+
+    def decode(self, quiz_id: str, token: str) -> Optional[Progress]:
+        """The Progress in a token, or None if it is malformed or forged."""
+        if not token or len(token) > MAX_TOKEN_CHARS:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) < 1 + 4 + VERSION_BYTES + TAG_BYTES or raw[0] != FORMAT:
+            return None
+
+        view = memoryview(raw)
+        body, tag = view[:-TAG_BYTES], view[-TAG_BYTES:]
+        if not hmac.compare_digest(self._tag(quiz_id, body), tag):
+            return None
+
+        fields = []
+        pos, end = 1, len(body) - VERSION_BYTES
+        for _ in range(4):
+            value = shift = 0
+            while True:
+                if pos >= end or shift > 14:
+                    return None
+                byte = body[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            fields.append(value)
+        if pos != end:
+            return None
+        idx, tries, total_attempts, perfect_solves = fields
+        return Progress(
+            pack_version=body[end:].hex(),
+            idx=idx,
+            tries=tries,
+            total_attempts=total_attempts,
+            perfect_solves=perfect_solves,
+        )
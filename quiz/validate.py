@@ -0,0 +1,155 @@
+"""
+Batch validation of quiz packs before a deploy.
+
+    python -m quiz.validate                    # every pack in packs/
+    python -m quiz.validate libs/ extra.toml   # files and directories, recursively
+    python -m quiz.validate --jobs 8 big-library/ > report.jsonl
+
+Each pack goes through the same parse, schema check and compile as
+load_pack. The compiled riddles are then exercised with the app's own
+check_answer and the pack's normalizer, so this cannot drift from what
+players hit:
+
+- mcq: the answer is accepted and no other option is;
+- text: every accepted answer normalizes to something and is accepted;
+- cipher: every variant's question shows its ciphertext, and the
+  ciphertext decodes back to the plaintext. The answer of an encode
+  riddle decodes back to the encoded word.
+
+Files are spread over a process pool and one JSON object per file is
+printed as soon as it is ready, in argument order. The exit status is 1
+when any pack is invalid.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from quiz.ciphers import decode, encode, encode_many, variant_keys
+from quiz.packs import PACKS_DIR, QUIZ_ID_RE, PackError, compile_pack, parse_pack, validate_pack
+from quiz.riddles import Riddle, check_answer
+
+PACK_SUFFIXES = (".json", ".toml")
+
+
+def check_riddle(riddle: Riddle, raw: dict, where: str) -> List[str]:
+    """Runtime checks on one compiled riddle against its pack entry."""
+    if riddle.type == "mcq":
+        accepted = [o for o in riddle.options if check_answer(riddle, selected=o)]
+        if accepted != [riddle.answer]:
+            return [f"{where}: options accepted at runtime are {accepted}, expected [{riddle.answer!r}]"]
+        return []
+
+    problems = []
+    for answer in riddle.answers:
+        if not riddle.normalize(answer):
+            problems.append(f"{where}: answer {answer!r} normalizes to nothing")
+        elif not check_answer(riddle, user_input=answer):
+            problems.append(f"{where}: answer {answer!r} is not accepted")
+    if raw["type"] == "cipher":
+        problems.extend(check_cipher(riddle, raw, where))
+    return problems
+
+
+def check_cipher(riddle: Riddle, raw: dict, where: str) -> List[str]:
+    cipher = raw["cipher"]
+    if "encode" in raw:
+        answer = riddle.answers[0]
+        decoded = decode(cipher, answer, raw.get("key"))
+        if riddle.normalize(decoded) != riddle.normalize(raw["encode"]):
+            return [f"{where}: answer {answer!r} decodes to {decoded!r}, not {raw['encode']!r}"]
+        return []
+
+    keys = variant_keys(raw)
+    shown = riddle.variants or ((riddle.question, riddle.hint),)
+    expected = riddle.normalize(raw["plaintext"])
+    for i, (key, text, (question, _)) in enumerate(zip(keys, encode_many(cipher, raw["plaintext"], keys), shown)):
+        label = f"{where}: variant {i}" if len(keys) > 1 else where
+        if text not in question:
+            return [f"{label}: the question does not show the ciphertext (missing {{ciphertext}}?)"]
+        try:
+            decoded = decode(cipher, text, key)
+        except (KeyError, ValueError) as e:
+            return [f"{label}: ciphertext does not decode: {e}"]
+        if riddle.normalize(decoded) != expected:
+            return [f"{label}: decodes to {decoded!r}, which does not match the plaintext"]
+    return []
+
+
+def validate_file(path: str) -> dict:
+    """Validate one pack file; always returns a result, never raises PackError."""
+    t0 = time.perf_counter()
+    p = Path(path)
+    result = {"path": path, "id": None, "ok": False, "riddles": 0, "problems": [], "warnings": []}
+    try:
+        raw = p.read_bytes()
+        data = parse_pack(raw, p)
+        problems = validate_pack(data, p.name)
+        if problems:
+            raise PackError("\n".join(problems))
+        pack = compile_pack(data, hashlib.sha256(raw).hexdigest()[:12], str(p))
+    except OSError as e:
+        result["problems"] = [f"{p.name}: {e.strerror}"]
+    except PackError as e:
+        result["problems"] = str(e).splitlines()
+    else:
+        result["id"] = pack.id
+        result["riddles"] = len(pack)
+        for i, (riddle, entry) in enumerate(zip(pack.riddles, data["riddles"]), start=1):
+            result["problems"].extend(check_riddle(riddle, entry, f"{p.name}: riddle #{i}"))
+        if not QUIZ_ID_RE.fullmatch(p.stem):
+            result["warnings"].append(f"{p.name}: ?quiz= cannot select this file (name must match {QUIZ_ID_RE.pattern})")
+        result["ok"] = not result["problems"]
+    result["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return result
+
+
+def find_packs(paths: Iterable[str]) -> Iterator[str]:
+    for arg in paths:
+        p = Path(arg)
+        if p.is_dir():
+            yield from sorted(str(f) for f in p.rglob("*") if f.suffix.lower() in PACK_SUFFIXES and f.is_file())
+        else:
+            yield str(p)
+
+
+def validate_all(paths: List[str], jobs: int) -> Iterator[dict]:
+    """validate_file for every path, in order, streamed as results complete."""
+    if jobs <= 1 or len(paths) <= 1:
+        yield from map(validate_file, paths)
+        return
+    chunksize = max(1, min(32, len(paths) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(validate_file, paths, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quiz.validate", description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="*", default=[str(PACKS_DIR)], help="pack files or directories (default: packs/)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="worker processes (default: one per CPU)")
+    parser.add_argument("--errors-only", action="store_true", help="only print packs with problems")
+    args = parser.parse_args(argv)
+
+    paths = list(find_packs(args.paths))
+    t0 = time.perf_counter()
+    bad = 0
+    for result in validate_all(paths, args.jobs):
+        bad += not result["ok"]
+        if result["ok"] and args.errors_only:
+            continue
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    print(
+        f"{len(paths)} packs, {bad} invalid, {time.perf_counter() - t0:.2f}s with {args.jobs} jobs",
+        file=sys.stderr,
+    )
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
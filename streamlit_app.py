@@ -16,12 +16,25 @@ Note: Cannot be hosted on GitHub Pages (static sites only)
 Progress is automatically saved in the URL - users can bookmark to resume!
 """
 
-import re
-import base64, mimetypes
-from pathlib import Path
+import os
+import secrets
+import time
 import streamlit as st
-import json
-from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from quiz import assets, build, prewarm, templates
+from quiz.events import EventLog, open_event_log
+from quiz.leaderboard import Leaderboard
+from quiz.metrics import Instrumentation
+from quiz.profiling import RunProfiler
+from quiz.packs import PackError, PackRegistry, default_registry
+from quiz.progress import ProgressStore, open_store
+from quiz.ratelimit import SubmitLimiter
+from quiz.recording import SessionRecorder, open_query
+from quiz.riddles import check_answer
+from quiz.session import Game, purge_widgets, session_bytes, stats as session_stats
+from quiz.snapshots import SessionSnapshots, open_session_snapshots
+from quiz.tokens import TokenCodec, load_secret
 
 # -------------------------------
 # Page setup
@@ -34,732 +47,510 @@ st.set_page_config(
 )
 
 # -------------------------------
-# Local Storage Functions
+# Instrumentation (QUIZ_METRICS=1; see quiz/metrics.py)
 # -------------------------------
-def load_progress():
-    """Load progress from browser localStorage via JavaScript"""
-    local_storage_code = """
-    <script>
-    // Function to load data from localStorage
-    function loadFromLocalStorage() {
-        const data = localStorage.getItem('mariana_quiz_progress');
-        if (data) {
-            const progress = JSON.parse(data);
-            // Send data to Streamlit
-            window.parent.postMessage({
-                type: 'streamlit:setComponentValue',
-                data: progress
-            }, '*');
-        }
-    }
-    
-    // Load on page load
-    window.addEventListener('load', loadFromLocalStorage);
-    </script>
-    """
-    st.components.v1.html(local_storage_code, height=0)
-
-def save_progress(idx, tries, total_attempts, perfect_solves):
-    """Save progress to browser localStorage via JavaScript"""
-    progress_data = {
-        'idx': idx,
-        'tries': tries,
-        'total_attempts': total_attempts,
-        'perfect_solves': perfect_solves,
-        'last_updated': datetime.now().isoformat()
-    }
-    
-    save_code = f"""
-    <script>
-    // Save progress to localStorage
-    localStorage.setItem('mariana_quiz_progress', JSON.stringify({json.dumps(progress_data)}));
-    </script>
-    """
-    st.components.v1.html(save_code, height=0)
+# The whole script runs again on every full rerun. One-time work (opening
+# stores, starting threads, registering gauges) belongs in the cached
+# initializers, so a rerun only renders.
+@st.cache_resource(show_spinner=False)
+def instrumentation() -> Instrumentation:
+    """Per-rerun timings and payload sizes, shared by every session."""
+    inst = Instrumentation.from_env()
+    inst.register_gauges("sessions", session_stats)
+    return inst
+
+METRICS = instrumentation()
+METRICS.begin_run()
+
+@st.cache_resource(show_spinner=False)
+def run_profiler() -> RunProfiler:
+    """Profiles the runs of sessions opened with ?profile=<QUIZ_PROFILE_KEY>."""
+    return RunProfiler.from_env()
+
+PROFILER = run_profiler()
+PROFILER.begin()
+run_finished = False
+try:
+    # -------------------------------
+    # Startup prewarm (quiz/prewarm.py; already running under `python -m quiz.serve`)
+    # -------------------------------
+    @st.cache_resource(show_spinner=False)
+    def startup_prewarm() -> prewarm.Prewarm:
+        """The process-wide prewarm, started on the first session if the wrapper did not."""
+        warm = prewarm.start()
+        METRICS.register_gauges("prewarm", warm.stats)
+        return warm
+
+    startup_prewarm()
+
+    # -------------------------------
+    # Utilities
+    # -------------------------------
+    @st.cache_resource(show_spinner=False)
+    def video_to_data_uri(path: str) -> str:
+        """Read a video file and return a base64 data URI string (one shared copy, never re-pickled)."""
+        return assets.data_uri(path)
+
+    @st.cache_resource(show_spinner=False)
+    def asset_server() -> assets.AssetServer:
+        """One local asset server per process, shared by every session."""
+        return assets.AssetServer.from_env().start()
+
+    @st.cache_resource(show_spinner=False)
+    def video_src(path: str, mode: str, mtime: float) -> str:
+        """Return the URL the hero <video> should load (mtime busts the cache on edits)."""
+        if mode == "inline":
+            return video_to_data_uri(path)
+        if mode == "server":
+            return asset_server().register(path)
+        return assets.publish_static(path)
+
+    # -------------------------------
+    # Enhanced Styling (styles/quiz.css, built by `python -m quiz.build`)
+    # -------------------------------
+    STYLESHEET = "styles/quiz.css"
+    ASSET_MODE = os.environ.get("QUIZ_ASSET_MODE", "static")  # static | server | inline
+
+    @st.cache_resource(show_spinner=False)
+    def stylesheet_tag(mode: str, mtime: float) -> str:
+        """One <link> to the minified, content-hashed stylesheet (mtime rebuilds on edits)."""
+        manifest = build.ensure_styles()
+        name = manifest["stylesheet"]
+        if mode == "inline":
+            css = (assets.STATIC_DIR / name).read_text(encoding="utf-8")
+            for font in manifest["fonts"]:
+                css = css.replace(font, f"{assets.STATIC_URL}/{font}")
+            return f"<style>{css}</style>"
+        if mode == "server":
+            for font in manifest["fonts"]:
+                asset_server().register(assets.STATIC_DIR / font, name=font)
+            href = asset_server().register(assets.STATIC_DIR / name, name=name)
+        else:
+            href = f"{assets.STATIC_URL}/{name}"
+        return f'<link rel="stylesheet" href="{href}">'
 
-# -------------------------------
-# Page setup
-# -------------------------------
-st.set_page_config(
-    page_title="Mariana's Birthday Quiz 🎂",
-    page_icon="🎉",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
+    st.markdown(stylesheet_tag(ASSET_MODE, os.stat(STYLESHEET).st_mtime), unsafe_allow_html=True)
+    METRICS.lap("css")
 
-# -------------------------------
-# Utilities
-# -------------------------------
-def _rerun():
+    # -------------------------------
+    # Quiz packs (packs/<quiz id>.json or .toml, picked with ?quiz=<id>)
+    # -------------------------------
+    DEFAULT_QUIZ = os.environ.get("QUIZ_DEFAULT", "mariana")
+
+    @st.cache_resource(show_spinner=False)
+    def pack_registry() -> PackRegistry:
+        """Compiled packs for every quiz, shared by all sessions in the process."""
+        registry = default_registry()
+        METRICS.register_gauges("pack_cache", registry.stats)
+        return registry
+
+    QUIZ_ID = st.query_params.get("quiz", DEFAULT_QUIZ)
     try:
-        st.rerun()
-    except Exception:
-        st.experimental_rerun()
-
-@st.cache_data(show_spinner=False)
-def video_to_data_uri(path: str) -> str:
-    """Read a video file and return a base64 data URI string."""
-    p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(f"Video not found at: {p.resolve()}")
-    mime = mimetypes.guess_type(p.name)[0] or "video/mp4"
-    data64 = base64.b64encode(p.read_bytes()).decode("utf-8")
-    return f"data:{mime};base64,{data64}"
-
-def normalize_text(s: str) -> str:
-    # Lower, strip, collapse whitespace, remove punctuation (keep letters/numbers with accents)
-    s = s.lower().strip()
-    s = re.sub(r"[^a-z0-9À-ÿ\s'-]", " ", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-def check_answer(riddle, user_input=None, selected=None):
-    if riddle["type"] == "mcq":
-        return selected == riddle["answer"]
-    else:
-        if not user_input:
-            return False
-        user_norm = normalize_text(user_input)
-        valid = [normalize_text(a) for a in riddle["answers"]]
-        return user_norm in valid
+        latest_pack = pack_registry().get(QUIZ_ID)
+    except PackError as e:
+        st.error(f"Could not load the quiz pack 😢\n\n{e}")
+        st.stop()
+    METRICS.lap("pack")
+
+    # -------------------------------
+    # Hero banner (looping video + title)
+    # -------------------------------
+    VIDEO_PATH = "seavid.mp4"
+    HERO_MODE = os.environ.get("QUIZ_HERO_MODE", "adaptive")  # adaptive | video
+    MEDIA_MANIFEST = assets.STATIC_DIR / "media.json"  # written by `python -m quiz.build media`
+
+    def media_mtime() -> float:
+        try:
+            return os.stat(MEDIA_MANIFEST).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    @st.cache_resource(show_spinner=False)
+    def hero_media(mode: str, mtime: float, manifest_mtime: float):
+        """(poster URL, [(media query, URL)]) from `python -m quiz.build media`, or None if not built.
+
+        Keyed on the manifest's mtime too, so a build is picked up without a restart.
+        """
+        from quiz import media  # the ffmpeg build helpers are not needed on other runs
+
+        manifest = media.load_media(VIDEO_PATH)
+        if manifest is None or mode == "inline":
+            return None
+
+        def url(name):
+            if mode == "server":
+                return asset_server().register(assets.STATIC_DIR / name, name=name)
+            return f"{assets.STATIC_URL}/{name}"
+
+        return url(manifest["poster"]), [(query, url(name)) for query, name in media.sources(manifest)]
+
+    HERO_TEMPLATES = templates.for_pack(latest_pack)
+
+    # Set when a full-size video is held back until the rest of the page is out
+    DEFERRED_HERO = None
+    try:
+        mtime = os.stat(VIDEO_PATH).st_mtime
+        adaptive = hero_media(ASSET_MODE, mtime, media_mtime()) if HERO_MODE == "adaptive" else None
+        if adaptive is None:
+            with METRICS.section("video_src"):
+                VIDEO_SRC = video_src(VIDEO_PATH, ASSET_MODE, mtime)
+            st.markdown(HERO_TEMPLATES.video_hero(VIDEO_SRC), unsafe_allow_html=True)
+        else:
+            poster, renditions = adaptive
+            poster_html = HERO_TEMPLATES.poster_hero(poster)
+            if st.context.headers.get("Save-Data", "").strip().lower() == "on":
+                st.markdown(poster_html, unsafe_allow_html=True)
+            else:
+                # No source matches under prefers-reduced-motion, leaving the poster
+                video_html = HERO_TEMPLATES.adaptive_hero(poster, renditions)
+                if st.session_state.get("hero_video"):
+                    st.markdown(video_html, unsafe_allow_html=True)
+                else:
+                    # First paint: the poster now, the video once the quiz is on screen
+                    HERO = st.empty()
+                    HERO.markdown(poster_html, unsafe_allow_html=True)
+                    DEFERRED_HERO = video_html
+    except FileNotFoundError as e:
+        # Fallback without video
+        st.markdown(HERO_TEMPLATES.plain_hero(), unsafe_allow_html=True)
+    METRICS.lap("hero")
+
+    # -------------------------------
+    # Player + saved progress
+    # -------------------------------
+    @st.cache_resource(show_spinner=False)
+    def progress_store() -> ProgressStore:
+        """SQLite (or QUIZ_PROGRESS_STORE) backed progress, shared by all sessions."""
+        store = open_store()
+        METRICS.register_gauges("progress", store.stats)
+        return store
+
+    @st.cache_resource(show_spinner=False)
+    def token_codec() -> TokenCodec:
+        """Signs the ?progress= token; keyed by QUIZ_TOKEN_SECRET."""
+        return TokenCodec(load_secret())
+
+    @st.cache_resource(show_spinner=False)
+    def event_log() -> EventLog:
+        """Append-only analytics log (QUIZ_EVENT_LOG), written off the render thread."""
+        log = open_event_log()
+        METRICS.register_gauges("events", log.stats)
+        return log
+
+    EVENTS = event_log()
+
+    @st.cache_resource(show_spinner=False)
+    def session_snapshots() -> SessionSnapshots:
+        """Periodic snapshots of live games (QUIZ_SNAPSHOT), restored after a restart."""
+        snapshots = open_session_snapshots()
+        METRICS.register_gauges("snapshots", snapshots.stats)
+        return snapshots
+
+    SNAPSHOTS = session_snapshots()
+
+    PLAYER_ID = st.query_params.get("player", "")
+    if not (
+        8 <= len(PLAYER_ID) <= 32
+        and PLAYER_ID.isascii()
+        and PLAYER_ID.replace("-", "").replace("_", "").isalnum()
+    ):
+        PLAYER_ID = secrets.token_urlsafe(12)
+        st.query_params["player"] = PLAYER_ID
+
+    @st.cache_resource(show_spinner=False)
+    def session_recorder() -> SessionRecorder:
+        """Records sessions opened with ?record=<QUIZ_RECORD_KEY> for replay benchmarks."""
+        return SessionRecorder.from_env()
+
+    RECORDING = session_recorder().recording(PLAYER_ID, st.query_params.get("record"))
+
+    def record(step, **fields):
+        if RECORDING is not None:
+            RECORDING.append(step, **fields)
+
+    def save_game(g):
+        """Queue the stats for the background writer and put a signed copy in the URL."""
+        progress = g.progress()
+        with METRICS.section("save_progress"):
+            progress_store().save(PLAYER_ID, QUIZ_ID, progress)
+            st.query_params["progress"] = token_codec().encode(QUIZ_ID, progress)
+        return progress
+
+    @st.cache_resource(show_spinner=False)
+    def leaderboard() -> Leaderboard:
+        """Top players per quiz, seeded once from the progress store."""
+        board = Leaderboard.from_env().seed(progress_store().scan())
+        METRICS.register_gauges("leaderboard", board.stats)
+        return board
+
+    @st.cache_resource(show_spinner=False)
+    def submit_limiter() -> SubmitLimiter:
+        """Token buckets per session and per client IP, shared by all sessions."""
+        limiter = SubmitLimiter.from_env()
+        METRICS.register_gauges("ratelimit", limiter.stats)
+        return limiter
+
+    def log_event(kind, g, **extra):
+        EVENTS.record(kind, QUIZ_ID, g.pack.version, PLAYER_ID, g.idx, **extra)
+
+    # -------------------------------
+    # Session state (one game per quiz id)
+    # -------------------------------
+    GAME_KEY = f"quiz:{QUIZ_ID}"
+
+    def game() -> Game:
+        """This session's state for the quiz in the URL."""
+        return st.session_state[GAME_KEY]
+
+    def saved_progress():
+        """Progress to resume from: the server store, else the URL token."""
+        saved = progress_store().load(PLAYER_ID, QUIZ_ID)
+        if saved is not None:
+            return saved
+        # Only a signed token counts; an old unsigned ?progress=N starts from riddle 1
+        return token_codec().decode(QUIZ_ID, st.query_params.get("progress", ""))
+
+    if GAME_KEY not in st.session_state:
+        record("open", query=open_query(st.query_params))
+        st.session_state[GAME_KEY] = Game(latest_pack)
+        saved = saved_progress()
+        # A snapshot taken before a restart also brings back the hint and timer,
+        # unless the stored progress moved on after it was taken
+        snap = SNAPSHOTS.restore(PLAYER_ID, QUIZ_ID)
+        SNAPSHOTS.track(PLAYER_ID, QUIZ_ID, game())
+        if snap is not None and saved in (None, snap.progress):
+            saved = snap.progress
+        else:
+            snap = None
+        if saved is not None and 0 < saved.idx <= len(latest_pack) and saved.plausible:
+            notice = f"📚 Welcome back! Resuming from Riddle #{saved.idx + 1}"
+            if saved.pack_version != latest_pack.version:
+                notice += " (the riddles were updated since your last visit)"
+            game().resume(saved, notice)
+            if snap is not None:
+                game().hinted = snap.hinted
+                game().shown_at = time.time() - snap.elapsed
+            log_event("resume", game())
+    METRICS.lap("session")
+
+    # -------------------------------
+    # Callbacks
+    # -------------------------------
+    # These run before the fragments render. A correct answer reruns just the two
+    # quiz fragments by key, so the hero, CSS and footer are never re-sent on a
+    # submit and a solve costs one fragment run instead of two full script runs.
+    QUIZ_FRAGMENTS = ["quiz_stats", "quiz_riddle"]
+
+    def reset_quiz():
+        log_event("reset", game())
+        record("reset")
+        purge_widgets(st.session_state, QUIZ_ID, range(game().idx + 1))
+        st.session_state[GAME_KEY] = Game(pack_registry().get(QUIZ_ID))
+        SNAPSHOTS.track(PLAYER_ID, QUIZ_ID, game())
+        save_game(game())
+        st.rerun(QUIZ_FRAGMENTS)
+
+    def submit_answer(idx):
+        g = game()
+        if idx != g.idx:
+            return  # stale form from a previous riddle
+        r = g.pack.riddles[idx]
+        value = st.session_state.get(f"{QUIZ_ID}_answer_{idx}")
+        record("choose" if r.type == "mcq" else "answer", riddle=idx, value=value)
+        # Throttled presses stop here: no check, save, event or hint
+        if not submit_limiter().allow(get_script_run_ctx().session_id, st.context.ip_address):
+            g.feedback = "throttled"
+            return
+        if r.type == "mcq":
+            if value is None:
+                g.feedback = "empty"
+                return
+            with METRICS.section("check_answer"):
+                correct = check_answer(r, selected=value)
+        else:
+            if not (value or "").strip():
+                g.feedback = "empty"
+                return
+            with METRICS.section("check_answer"):
+                correct = check_answer(r, user_input=value)
+
+        if not correct:
+            # Only the riddle fragment reruns (the default for a widget inside it)
+            log_event("attempt", g, **{"try": g.tries})
+            g.tries += 1
+            g.feedback = "wrong"
+            save_game(g)
+            return
+
+        now = time.time()
+        log_event("correct", g, **{"try": g.tries, "secs": round(now - g.shown_at, 1)})
+        g.solve(now)
+        g.feedback = "correct"
+        # The solved riddle's widgets are never rendered again
+        purge_widgets(st.session_state, QUIZ_ID, [idx])
+        # Auto-save progress (server + signed token in the URL)
+        leaderboard().update(QUIZ_ID, PLAYER_ID, save_game(g))
+        st.rerun(QUIZ_FRAGMENTS)
+
+    def hint_opened(idx):
+        g = game()
+        # Opening or closing the expander reruns the riddle fragment, which has
+        # already taken the feedback; put it back so the hint stays on screen
+        if idx == g.idx:
+            g.feedback = "wrong"
+        # Count the first opening per riddle; closing and reopening is the same hint
+        if st.session_state.get(f"{QUIZ_ID}_hint_{idx}") and g.hinted != idx and idx == g.idx:
+            g.hinted = idx
+            log_event("hint", g)
+            record("hint", riddle=idx)
+
+    # -------------------------------
+    # Progress + stats (fragment)
+    # -------------------------------
+    @st.fragment(key="quiz_stats")
+    @METRICS.timed("quiz_stats")
+    @PROFILER.profiled("quiz_stats")
+    def stats_panel():
+        g = game()
+        idx = g.idx
+        total = len(g.pack)
+        html = templates.for_pack(g.pack)
+        notice = g.take("notice")
+        if notice:
+            st.info(notice)
+
+        # Progress display
+        st.markdown('<div class="progress-container">', unsafe_allow_html=True)
+        st.markdown(html.progress[idx], unsafe_allow_html=True)
+        st.progress(idx / total)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        # Controls
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            st.markdown('<div class="reset-button">', unsafe_allow_html=True)
+            st.button("🔄 Reset", on_click=reset_quiz)
+            st.markdown('</div>', unsafe_allow_html=True)
+
+        # Stats Card
+        if idx > 0:  # Only show stats after at least one riddle is solved
+            accuracy = g.progress().accuracy * 100
+            st.markdown(html.stats.render(solved=idx, perfect=g.perfect_solves, accuracy=accuracy), unsafe_allow_html=True)
+
+        # Leaderboard: a snapshot of the top K, refreshed every few seconds
+        standings = leaderboard().top(QUIZ_ID)
+        if standings:
+            with st.expander("🏆 Leaderboard"):
+                lines = ["| # | Player | Solved | Perfect | Accuracy |", "|---|---|---|---|---|"]
+                for s in standings:
+                    name = "**You**" if s.player == PLAYER_ID else s.name
+                    lines.append(f"| {s.rank} | {name} | {s.solved} | {s.perfect_solves} | {s.accuracy:.0%} |")
+                st.markdown("\n".join(lines))
+                rank = leaderboard().rank(QUIZ_ID, PLAYER_ID)
+                if rank is not None and rank > len(standings):
+                    st.caption(f"You are #{rank}")
+
+    # -------------------------------
+    # Question card + feedback (fragment)
+    # -------------------------------
+    @st.fragment(key="quiz_riddle")
+    @METRICS.timed("quiz_riddle")
+    @PROFILER.profiled("quiz_riddle")
+    def riddle_panel():
+        g = game()
+        idx = g.idx
+        total = len(g.pack)
+        html = templates.for_pack(g.pack)
+        feedback = g.take("feedback")
+
+        if idx >= total:
+            # Completed!
+            final_accuracy = g.progress().accuracy * 100
+            st.markdown(html.completion.render(perfect=g.perfect_solves, accuracy=final_accuracy), unsafe_allow_html=True)
+            st.snow()
+            return
+
+        r = g.pack.riddles[idx]
+
+        # Celebrate the riddle that was just solved
+        if feedback == "correct":
+            st.success("🎉 Brilliant! That's correct!")
+            with METRICS.section("balloons"):
+                st.balloons()
+
+        st.markdown('<div class="question-card">', unsafe_allow_html=True)
+        st.markdown(html.numbers[idx], unsafe_allow_html=True)
+        question, hint = r.for_player(PLAYER_ID)
+        st.markdown(html.question(question), unsafe_allow_html=True)
+
+        # Use forms so Enter submits nicely
+        with st.form(key=f"riddle_form_{QUIZ_ID}_{idx}", clear_on_submit=False):
+            if r.type == "mcq":
+                st.radio("Choose your answer:", r.options, index=None, key=f"{QUIZ_ID}_answer_{idx}")
+                st.form_submit_button("Submit Answer ✨", use_container_width=True, on_click=submit_answer, args=(idx,))
+                if feedback == "empty":
+                    st.warning("Please select an option first! 🤔")
+            else:
+                st.text_input("Your answer:", value="", placeholder="Type your answer here...", key=f"{QUIZ_ID}_answer_{idx}")
+                st.form_submit_button("Submit Answer ✨", use_container_width=True, on_click=submit_answer, args=(idx,))
+                if feedback == "empty":
+                    st.warning("Please type an answer first! 🤔")
 
-# -------------------------------
-# Enhanced Styling
-# -------------------------------
-st.markdown("""
-<style>
-/* Import Google Fonts */
-@import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700;900&family=Inter:wght@400;500;600&display=swap');
-
-/* Main background - blue gradient */
-html, body, [data-testid="stAppViewContainer"] {
-    background: linear-gradient(135deg, #e0f2fe 0%, #f0f9ff 50%, #dbeafe 100%);
-    color: #0c4a6e;
-}
-
-/* Remove default header background */
-[data-testid="stHeader"] { 
-    background: transparent; 
-}
-
-/* Container adjustments */
-.main .block-container {
-    padding-top: 2rem;
-    padding-bottom: 3rem;
-    max-width: 950px;
-}
-
-/* Mobile responsiveness */
-@media (max-width: 768px) {
-    .main .block-container {
-        padding: 1rem 0.5rem;
-    }
-    
-    .hero {
-        height: 35vh;
-        min-height: 250px;
-        margin: 0 0 1.5rem 0;
-        border-radius: 16px;
-    }
-    
-    .hero h1 {
-        font-size: clamp(2rem, 8vw, 3rem);
-    }
-    
-    .question-card {
-        padding: 1.5rem;
-        border-radius: 16px;
-    }
-    
-    .question-text {
-        font-size: 1.4rem;
-    }
-    
-    .stats-card {
-        padding: 1.25rem;
-        grid-template-columns: 1fr;
-        gap: 1rem;
-    }
-    
-    .completion-card {
-        padding: 2rem 1.5rem;
-    }
-    
-    .completion-title {
-        font-size: 2rem;
-    }
-}
-
-/* Hero Banner */
-.hero {
-    position: relative;
-    width: 100%;
-    height: 45vh;
-    min-height: 350px;
-    max-height: 500px;
-    overflow: hidden;
-    border-radius: 24px;
-    box-shadow: 0 20px 60px rgba(14, 165, 233, 0.15);
-    margin: 0 0 2.5rem 0;
-    background: linear-gradient(135deg, #0ea5e9 0%, #0284c7 100%);
-}
-
-.hero video {
-    position: absolute;
-    top: 50%;
-    left: 50%;
-    min-width: 100%;
-    min-height: 100%;
-    transform: translate(-50%, -50%);
-    object-fit: cover;
-    filter: brightness(0.6) contrast(1.1) saturate(1.2);
-    mix-blend-mode: multiply;
-}
-
-.hero .title {
-    position: absolute;
-    inset: 0;
-    display: flex;
-    flex-direction: column;
-    justify-content: center;
-    align-items: center;
-    text-align: center;
-    padding: 2rem;
-    background: linear-gradient(to bottom, rgba(0,0,0,0.1), rgba(0,0,0,0.3));
-}
-
-.hero h1 {
-    font-family: 'Playfair Display', serif;
-    font-weight: 900;
-    font-size: clamp(2.5rem, 7vw, 4.5rem);
-    color: #ffffff;
-    text-shadow: 0 4px 20px rgba(0,0,0,0.3);
-    margin: 0;
-    line-height: 1.1;
-    letter-spacing: -0.02em;
-}
-
-.hero p {
-    font-family: 'Inter', sans-serif;
-    font-size: clamp(1rem, 2vw, 1.25rem);
-    color: rgba(255, 255, 255, 0.95);
-    margin-top: 1rem;
-    font-weight: 500;
-    text-shadow: 0 2px 10px rgba(0,0,0,0.2);
-}
-
-/* Progress Section */
-.progress-container {
-    background: rgba(255, 255, 255, 0.8);
-    backdrop-filter: blur(10px);
-    border-radius: 16px;
-    padding: 1.5rem;
-    margin-bottom: 2rem;
-    box-shadow: 0 4px 20px rgba(14, 165, 233, 0.1);
-    border: 1px solid rgba(14, 165, 233, 0.1);
-}
-
-/* Stats Card */
-.stats-card {
-    background: rgba(255, 255, 255, 0.9);
-    backdrop-filter: blur(20px);
-    border: 2px solid rgba(14, 165, 233, 0.15);
-    border-radius: 20px;
-    padding: 2rem;
-    box-shadow: 0 10px 40px rgba(14, 165, 233, 0.08);
-    margin-bottom: 2rem;
-    display: grid;
-    grid-template-columns: repeat(3, 1fr);
-    gap: 2rem;
-    text-align: center;
-}
-
-.stat-item {
-    padding: 0.5rem;
-}
-
-.stat-number {
-    font-family: 'Playfair Display', serif;
-    font-size: 2.5rem;
-    font-weight: 900;
-    background: linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    line-height: 1;
-    margin-bottom: 0.5rem;
-}
-
-.stat-label {
-    font-family: 'Inter', sans-serif;
-    font-size: 0.875rem;
-    color: #6b46c1;
-    font-weight: 600;
-    text-transform: uppercase;
-    letter-spacing: 0.05em;
-}
-
-.progress-text {
-    font-family: 'Inter', sans-serif;
-    font-size: 0.9rem;
-    color: #6b46c1;
-    font-weight: 600;
-    margin-bottom: 0.75rem;
-}
-
-/* Progress bar styling */
-.stProgress > div > div {
-    background: linear-gradient(90deg, #6366f1 0%, #8b5cf6 100%);
-    height: 12px;
-    border-radius: 100px;
-}
-
-.stProgress > div {
-    background-color: rgba(99, 102, 241, 0.1);
-    border-radius: 100px;
-}
-
-/* Question Card */
-.question-card {
-    background: rgba(255, 255, 255, 0.95);
-    backdrop-filter: blur(20px);
-    border: 2px solid rgba(99, 102, 241, 0.15);
-    border-radius: 20px;
-    padding: 2.5rem;
-    box-shadow: 0 10px 40px rgba(99, 102, 241, 0.08);
-    margin-bottom: 2rem;
-}
-
-/* Question Title */
-.question-number {
-    font-family: 'Inter', sans-serif;
-    font-size: 0.875rem;
-    font-weight: 600;
-    color: #7c3aed;
-    text-transform: uppercase;
-    letter-spacing: 0.05em;
-    margin-bottom: 0.5rem;
-}
-
-.question-text {
-    font-family: 'Playfair Display', serif;
-    font-size: 1.75rem;
-    font-weight: 700;
-    color: #1e1b4b;
-    line-height: 1.4;
-    margin-bottom: 2rem;
-}
-
-/* Form inputs */
-.stTextInput > div > div > input {
-    font-family: 'Inter', sans-serif;
-    font-size: 1.1rem;
-    padding: 0.75rem 1.25rem;
-    border: 2px solid rgba(14, 165, 233, 0.2);
-    border-radius: 12px;
-    background: rgba(255, 255, 255, 0.8);
-    color: #0c4a6e;
-    transition: all 0.3s ease;
-}
-
-.stTextInput > div > div > input:focus {
-    border-color: #0ea5e9;
-    box-shadow: 0 0 0 3px rgba(14, 165, 233, 0.1);
-}
-
-/* Radio buttons */
-.stRadio > label {
-    font-family: 'Inter', sans-serif;
-    font-size: 0.9rem;
-    font-weight: 600;
-    color: #ffffff;
-    margin-bottom: 1rem;
-}
-
-.stRadio > div > label {
-    font-family: 'Inter', sans-serif;
-    font-size: 1.05rem;
-    color: #ffffff;
-    padding: 0.75rem 1.25rem;
-    margin: 0.5rem 0;
-    background: rgba(14, 165, 233, 1);
-    border: 2px solid transparent;
-    border-radius: 12px;
-    transition: all 0.3s ease;
-    cursor: pointer;
-}
-
-.stRadio > div > label:hover {
-    background: rgba(14, 165, 233, 0.1);
-    border-color: rgba(14, 165, 233, 0.3);
-}
-
-/* Submit button */
-.stButton > button {
-    font-family: 'Inter', sans-serif;
-    font-size: 1.1rem;
-    font-weight: 600;
-    padding: 0.875rem 2.5rem;
-    background: linear-gradient(135deg, #0ea5e9 0%, #6366f1 100%);
-    color: #ffffff;
-    border: none;
-    border-radius: 100px;
-    box-shadow: 0 4px 20px rgba(14, 165, 233, 1);
-    transition: all 0.3s ease;
-    width: 100%;
-    margin-top: 1rem;
-}
-
-.stButton > button:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 6px 30px rgba(14, 165, 233, 1);
-}
-
-/* Alert messages */
-.stAlert {
-    border-radius: 12px;
-    border: none;
-    font-family: 'Inter', sans-serif;
-}
-
-/* Success message */
-div[data-baseweb="notification"][kind="positive"] {
-    background: linear-gradient(135deg, #10b981 100%, #6366f1 100%);
-    color: #ffffff;
-}
-
-/* Error message */
-div[data-baseweb="notification"][kind="negative"] {
-    background: linear-gradient(135deg, #ef4444 100%, #6366f1 100%);
-    color: #ffffff;
-}
-
-/* Warning message */
-div[data-baseweb="notification"][kind="warning"] {
-    background: linear-gradient(135deg, #f59e0b 100%, #6366f1 100%);
-    color: #ffffff;
-}
-
-/* Hint expander */
-.streamlit-expanderHeader {
-    font-family: 'Inter', sans-serif;
-    font-size: 0.95rem;
-    font-weight: 600;
-    color: #ffffff;
-    background: rgba(139, 92, 246, 1);
-    border-radius: 8px;
-    padding: 0.5rem 1rem;
-}
-
-.streamlit-expanderContent {
-    font-family: 'Inter', sans-serif;
-    background: rgba(139, 92, 246, 1);
-    border-radius: 0 0 8px 8px;
-    padding: 1rem;
-}
-
-/* Completion card */
-.completion-card {
-    background: linear-gradient(135deg, rgba(99, 102, 241, 1) 100%, rgba(1, 1, 1, 1) 100%);
-    border: 2px solid rgba(99, 102, 241, 1);
-    border-radius: 24px;
-    padding: 3rem;
-    text-align: center;
-    box-shadow: 0 20px 60px rgba(99, 102, 241, 1);
-}
-
-.completion-title {
-    font-family: 'Playfair Display', serif;
-    font-size: 3rem;
-    font-weight: 900;
-    background: linear-gradient(135deg, #6366f1 100%, #8b5cf6 100%);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    margin-bottom: 1.5rem;
-}
-
-.completion-message {
-    font-family: 'Inter', sans-serif;
-    font-size: 1.25rem;
-    line-height: 1.6;
-    color: #ffffff;
-    font-weight: 500;
-}
-
-/* Reset button */
-.reset-button button {
-    background: rgba(139, 92, 246, 0.1);
-    color: #7c3aed;
-    border: 2px solid rgba(139, 92, 246, 0.2);
-    padding: 0.5rem 1.25rem;
-    font-size: 0.9rem;
-}
-
-.reset-button button:hover {
-    background: rgba(139, 92, 246, 0.2);
-    border-color: rgba(139, 92, 246, 0.3);
-}
-
-/* Footer */
-.footer-text {
-    text-align: center;
-    font-family: 'Inter', sans-serif;
-    color: #9272b0;
-    font-size: 0.875rem;
-    margin-top: 3rem;
-    padding-top: 2rem;
-    border-top: 1px solid rgba(139, 92, 246, 1);
-}
-            
-</style>
-""", unsafe_allow_html=True)
+        # Feedback + hint
+        if feedback == "throttled":
+            st.warning("Whoa, easy there! Take a breath before the next guess ⏳")
+        if feedback == "wrong":
+            st.error("Not quite right... Give it another try! 💭")
+            with st.expander("💡 Need a hint?", key=f"{QUIZ_ID}_hint_{idx}", on_change=hint_opened, args=(idx,)):
+                st.info(hint or "Think outside the box...")
 
-# -------------------------------
-# Hero banner (looping video + title)
-# -------------------------------
-VIDEO_PATH = "seavid.mp4"
-try:
-    VIDEO_SRC = video_to_data_uri(VIDEO_PATH)
-    st.markdown(f"""
-    <div class="hero">
-      <video autoplay muted loop playsinline>
-        <source src="{VIDEO_SRC}" type="video/mp4">
-      </video>
-      <div class="title">
-        <h1>Mariana's Birthday Quiz</h1>
-        <p>✨ Solve each riddle to unlock your birthday surprise ✨</p>
-      </div>
-    </div>
-    """, unsafe_allow_html=True)
-except FileNotFoundError as e:
-    # Fallback without video
-    st.markdown("""
-    <div class="hero" style="background: linear-gradient(135deg, #0ea5e9 0%, #0284c7 100%);">
-      <div class="title">
-        <h1>Mariana's Birthday Quiz</h1>
-        <p>✨ Solve each riddle to unlock your birthday surprise ✨</p>
-      </div>
-    </div>
-    """, unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-# -------------------------------
-# Riddles configuration
-# -------------------------------
-RIDDLES = [
-    {
-        "type": "mcq",
-        "question": "I have cities but no houses, forests but no trees, and water but no fish. What am I?",
-        "options": ["A dream", "A desert", "A map", "Google"],
-        "answer": "A map",
-        "hint": "You might fold me to carry me."
-    },
-    {
-        "type": "text",
-        "question": "(Atbash Cypher) DSZG BVZI DZH QZMV ZFHGVM YLIM?",
-        "answers": ["1775"],
-        "hint": "Fold the alphabet"
-    },
-    {
-        "type": "text",
-        "question": "Who's the best boy of them all",
-        "answers": ["Loki", "loki"],
-        "hint": "Dee dou"
-    },
-    {
-        "type": "mcq",
-        "question": "When did Lord Grantham first meet Mr Bates",
-        "options": ["100 year war", "boer war", "world war 1", "bolchevik war"],
-        "answer": "boer war",
-        "hint": "south african war"
-    },
-    {
-        "type": "text",
-        "question": "What title does Isobel receive when she remarries?",
-        "answers": ["baroness"],
-        "hint": "Ghost US Robber Bs"
-    },
-    {
-        "type": "mcq",
-        "question": "What does Molesley's father excel in?",
-        "options": ["gardening", "cooking", "raising hogs"],
-        "answer": "gardening",
-        "hint": "It increases every birthday."
-    },
-    {
-        "type": "text",
-        "question": "What has many keys but can't open a single lock?",
-        "answers": ["piano", "a piano", "keyboard", "a keyboard"],
-        "hint": "It makes music… or types emails."
-    },
-    {
-        "type": "text",
-        "question": "Type your name in binary.",
-        "answers": ["01101101 01100001 01110010 01101001 01100001 01101110 01100001"],
-        "hint": "you know...0s and 1s"
-    },
-    {
-        "type": "mcq",
-        "question": "I'm always in front of you but can't be seen. What am I?",
-        "options": ["The future", "Your reflection", "Your nose", "Air"],
-        "answer": "The future",
-        "hint": "It hasn't happened yet."
-    },
-    {
-        "type": "text",
-        "question": "(Ceasar cypher) - AHP FTGR IETGXML TKX BG MAX LHETK LRLMXF?",
-        "answers": ["1775"],
-        "hint": "Ceasar ROT7 Right"
-    },
-]
-
-TOTAL = len(RIDDLES)
+    # -------------------------------
+    # Main flow
+    # -------------------------------
+    stats_panel()
+    riddle_panel()
+    METRICS.lap("quiz")
 
-# -------------------------------
-# Session state
-# -------------------------------
-if "idx" not in st.session_state:
-    st.session_state.idx = 0  # current riddle index (0-based)
-if "tries" not in st.session_state:
-    st.session_state.tries = 0  # wrong attempts for current riddle
-if "total_attempts" not in st.session_state:
-    st.session_state.total_attempts = 0  # total attempts across all riddles
-if "perfect_solves" not in st.session_state:
-    st.session_state.perfect_solves = 0  # riddles solved on first try
-
-# Check URL parameters for saved progress
-query_params = st.query_params
-if "progress" in query_params and "resumed" not in st.session_state:
-    try:
-        saved_idx = int(query_params["progress"])
-        if 0 <= saved_idx <= TOTAL and saved_idx != st.session_state.idx:
-            st.session_state.idx = saved_idx
-            st.session_state.resumed = True
-            st.info(f"📚 Welcome back! Resuming from Riddle #{saved_idx + 1}")
-    except:
-        pass
-
-idx = st.session_state.idx
-progress = (idx / TOTAL)
-
-# Progress display
-st.markdown('<div class="progress-container">', unsafe_allow_html=True)
-st.markdown(f'<div class="progress-text">🎯 Progress: {idx} of {TOTAL} riddles solved</div>', unsafe_allow_html=True)
-st.progress(progress)
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Controls
-col1, col2 = st.columns([1, 5])
-with col1:
-    st.markdown('<div class="reset-button">', unsafe_allow_html=True)
-    if st.button("🔄 Reset"):
-        st.session_state.idx = 0
-        st.session_state.tries = 0
-        st.session_state.total_attempts = 0
-        st.session_state.perfect_solves = 0
-        if "resumed" in st.session_state:
-            del st.session_state.resumed
-        if "progress" in st.query_params:
-            del st.query_params["progress"]
-        _rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Stats Card
-if idx > 0:  # Only show stats after at least one riddle is solved
-    accuracy = (idx / max(st.session_state.total_attempts, 1)) * 100
-    st.markdown(f"""
-    <div class="stats-card">
-        <div class="stat-item">
-            <div class="stat-number">{idx}</div>
-            <div class="stat-label">Riddles Solved</div>
-        </div>
-        <div class="stat-item">
-            <div class="stat-number">{st.session_state.perfect_solves}</div>
-            <div class="stat-label">Perfect Solves</div>
-        </div>
-        <div class="stat-item">
-            <div class="stat-number">{accuracy:.0f}%</div>
-            <div class="stat-label">Accuracy</div>
-        </div>
+    # Footer
+    st.markdown("""
+    <div class="footer-text">
+        Made with 💙 for the most wonderful person • Happy Birthday, Mariana!<br>
+        <small style="opacity: 0.7;">Progress auto-saves in the URL - bookmark this page to resume anytime!</small>
     </div>
     """, unsafe_allow_html=True)
+    METRICS.lap("footer")
+
+    if DEFERRED_HERO is not None:
+        HERO.markdown(DEFERRED_HERO, unsafe_allow_html=True)
+        st.session_state["hero_video"] = True
+    run_finished = True
+finally:
+    # st.stop() and errors end the run here too, so no lock or run stays open
+    METRICS.end_run(finished=run_finished)
+    PROFILER.end()
 
 # -------------------------------
-# Main flow
+# Hidden debug panel (?debug=metrics while QUIZ_METRICS is on)
 # -------------------------------
-if idx < TOTAL:
-    r = RIDDLES[idx]
-    
-    st.markdown('<div class="question-card">', unsafe_allow_html=True)
-    st.markdown(f'<div class="question-number">Riddle #{idx + 1}</div>', unsafe_allow_html=True)
-    st.markdown(f'<div class="question-text">{r["question"]}</div>', unsafe_allow_html=True)
-    
-    correct = False
-    wrong = False
-
-    # Use forms so Enter submits nicely
-    with st.form(key=f"riddle_form_{idx}", clear_on_submit=False):
-        if r["type"] == "mcq":
-            choice = st.radio("Choose your answer:", r["options"], index=None)
-            submit = st.form_submit_button("Submit Answer ✨", use_container_width=True)
-            if submit:
-                if choice is None:
-                    st.warning("Please select an option first! 🤔")
-                else:
-                    correct = check_answer(r, selected=choice)
-                    wrong = not correct
-        else:
-            val = st.text_input("Your answer:", value="", placeholder="Type your answer here...")
-            submit = st.form_submit_button("Submit Answer ✨", use_container_width=True)
-            if submit:
-                if not val.strip():
-                    st.warning("Please type an answer first! 🤔")
-                else:
-                    correct = check_answer(r, user_input=val)
-                    wrong = not correct
-
-    # Feedback + hint
-    if correct:
-        st.success("🎉 Brilliant! That's correct!")
-        st.balloons()
-        if st.session_state.tries == 0:
-            st.session_state.perfect_solves += 1
-        st.session_state.total_attempts += st.session_state.tries + 1
-        st.session_state.idx += 1
-        st.session_state.tries = 0
-        # Auto-save progress to URL
-        st.query_params["progress"] = str(st.session_state.idx)
-        _rerun()
-    elif wrong:
-        st.session_state.tries += 1
-        st.error("Not quite right... Give it another try! 💭")
-        with st.expander("💡 Need a hint?"):
-            st.info(r.get("hint", "Think outside the box..."))
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-else:
-    # Completed!
-    final_accuracy = (TOTAL / max(st.session_state.total_attempts, 1)) * 100
-    st.markdown(f"""
-    <div class="completion-card">
-        <div class="completion-title">🎂 Congratulations, Mariana! 🎂</div>
-        <div class="completion-message">
-            You solved every riddle we're so proud!<br>
-            <br>
-            <strong>Final Score:</strong> {st.session_state.perfect_solves} perfect solves out of {TOTAL} riddles<br>
-            <strong>Accuracy:</strong> {final_accuracy:.0f}%<br>
-            <br>
-            We love you dear, hope you have a great day!<br>
-            <br>
-            Happy Birthday, Amazing! 💖✨
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    st.snow()
-
-# Footer
-st.markdown("""
-<div class="footer-text">
-    Made with 💙 for the most wonderful person • Happy Birthday, Mariana!<br>
-    <small style="opacity: 0.7;">Progress auto-saves in the URL - bookmark this page to resume anytime!</small>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+if METRICS.enabled and st.query_params.get("debug") == "metrics":
+    snap = METRICS.snapshot(last=50)
+    with st.expander("🛠 Rerun metrics", expanded=True):
+        st.dataframe(
+            [
+                {
+                    "kind": r["kind"],
+                    "ms": round(r["seconds"] * 1000, 1),
+                    "elements": r["elements"],
+                    "messages": r["messages"],
+                    "KB": round(r["bytes"] / 1024, 1),
+                    "finished": r["finished"],
+                    **{k: round(v * 1000, 2) for k, v in r["sections"].items()},
+                }
+                for r in reversed(snap["recent"])
+            ],
+            use_container_width=True,
+        )
+        st.json({k: snap[k] for k in ("runs", "sections", "gauges")}, expanded=False)
+        st.caption(f"This session holds {session_bytes(st.session_state):,} bytes of state")